@@ -1,9 +1,14 @@
-from flask import Flask
+from flask import Flask, jsonify, request
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 import os
+from app.json_provider import OrjsonProvider
+from app.upload_request import UploadRequest
 
 def create_app():
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    app.request_class = UploadRequest
     CORS(app)
     
     # Configuration
@@ -13,9 +18,23 @@ def create_app():
     # Create uploads folder if it doesn't exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    @app.errorhandler(Exception)
+    def handle_error(e):
+        """Report API errors as {'error': message}; other pages keep Flask's HTTP errors"""
+        if isinstance(e, HTTPException):
+            if request.blueprint != 'upload':
+                return e
+            return jsonify({'error': e.description}), e.code
+        app.logger.exception('Unhandled error on %s', request.path)
+        return jsonify({'error': str(e)}), 500
+    
     # Register blueprints
-    from app.routes import main_bp, upload_bp
+    from app.routes import main_bp, upload_bp, get_extractor
     app.register_blueprint(main_bp)
     app.register_blueprint(upload_bp)
     
+    from app.config import Config
+    if Config.PRELOAD_EXTRACTOR:
+        get_extractor()
+    
     return app
@@ -11,11 +11,56 @@ class Config:
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
     OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
     OPENAI_MAX_TOKENS = int(os.getenv('OPENAI_MAX_TOKENS', '4096'))
+    # Token budget of one extraction request (prompt, document and response);
+    # longer documents are trimmed to their most relevant pages
+    OPENAI_CONTEXT_TOKENS = int(os.getenv('OPENAI_CONTEXT_TOKENS', '10000'))
+    
+    # OpenAI response cache (keyed by a hash of model, prompts and schema)
+    OPENAI_CACHE_ENABLED = os.getenv('OPENAI_CACHE_ENABLED', 'true').lower() == 'true'
+    OPENAI_CACHE_PATH = os.getenv('OPENAI_CACHE_PATH', os.path.join('cache', 'openai_responses.sqlite3'))
+    OPENAI_CACHE_TTL_SECONDS = int(os.getenv('OPENAI_CACHE_TTL_SECONDS', str(7 * 24 * 60 * 60)))
+    
+    # Semantic cache: serve a stored response for near-duplicate documents
+    # (cosine similarity of text embeddings at or above the threshold)
+    OPENAI_SEMANTIC_CACHE_ENABLED = os.getenv('OPENAI_SEMANTIC_CACHE_ENABLED', 'false').lower() == 'true'
+    OPENAI_SEMANTIC_CACHE_THRESHOLD = float(os.getenv('OPENAI_SEMANTIC_CACHE_THRESHOLD', '0.95'))
+    OPENAI_EMBEDDING_MODEL = os.getenv('OPENAI_EMBEDDING_MODEL', 'text-embedding-3-small')
+    
+    # Batch prompting: small documents share one request, K at a time. K starts at
+    # OPENAI_BATCH_SIZE and adapts to keep each request under the target latency.
+    OPENAI_BATCH_SIZE = int(os.getenv('OPENAI_BATCH_SIZE', '4'))
+    OPENAI_BATCH_MAX_SIZE = int(os.getenv('OPENAI_BATCH_MAX_SIZE', '8'))
+    OPENAI_BATCH_DOC_MAX_CHARS = int(os.getenv('OPENAI_BATCH_DOC_MAX_CHARS', '4000'))
+    OPENAI_BATCH_TARGET_SECONDS = float(os.getenv('OPENAI_BATCH_TARGET_SECONDS', '30'))
+    # A batch request gets OPENAI_BATCH_DOC_MAX_TOKENS of response per document, and
+    # K is capped so the total stays within the model's output limit
+    OPENAI_BATCH_DOC_MAX_TOKENS = int(os.getenv('OPENAI_BATCH_DOC_MAX_TOKENS', '1024'))
+    OPENAI_MAX_OUTPUT_TOKENS = int(os.getenv('OPENAI_MAX_OUTPUT_TOKENS', '4096'))
+    
+    # Async extraction: concurrent requests in flight, and the account's per-minute
+    # limits, which requests wait on instead of hitting 429s
+    OPENAI_MAX_ASYNC = int(os.getenv('OPENAI_MAX_ASYNC', '8'))
+    OPENAI_RPM_LIMIT = int(os.getenv('OPENAI_RPM_LIMIT', '500'))
+    OPENAI_TPM_LIMIT = int(os.getenv('OPENAI_TPM_LIMIT', '300000'))
     
     # Parsing Configuration
     USE_OPENAI_EXTRACTION = os.getenv('USE_OPENAI_EXTRACTION', 'true').lower() == 'true'
     ENABLE_FALLBACK = os.getenv('ENABLE_FALLBACK', 'true').lower() == 'true'
     
+    # Upload results kept in memory by content hash, so re-uploading a document
+    # skips parsing and extraction (0 disables), and how long clients may reuse them
+    RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '256'))
+    RESULT_CACHE_MAX_AGE_SECONDS = int(os.getenv('RESULT_CACHE_MAX_AGE_SECONDS', '3600'))
+    
+    # Background extraction (upload?async=true): worker threads, and how many
+    # jobs are remembered for polling before the oldest finished ones are dropped
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+    JOB_MAX_KEPT = int(os.getenv('JOB_MAX_KEPT', '1000'))
+    
+    # Import the parsers when the app starts instead of on the first upload
+    # (e.g. in production, so no request pays for it); off keeps dev reloads fast
+    PRELOAD_EXTRACTOR = os.getenv('PRELOAD_EXTRACTOR', 'false').lower() == 'true'
+    
     # Flask Configuration
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB max file size
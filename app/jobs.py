@@ -0,0 +1,50 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from app.config import Config
+
+class JobQueue:
+    """In-process background queue: submit returns a job id, results wait to be polled"""
+    
+    def __init__(self, workers: int, max_jobs: int):
+        self.max_jobs = max_jobs
+        # Threads start on first submit; parsing hands long PDFs to the process pool
+        # and OpenAI calls wait on the network, so threads keep the workers busy
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='extract-job')
+        self._jobs: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def submit(self, fn: Callable[..., Dict[str, Any]], *args: Any) -> str:
+        """Queue fn(*args) and return its job id"""
+        job_id = uuid.uuid4().hex
+        future = self._executor.submit(fn, *args)
+        with self._lock:
+            self._jobs[job_id] = future
+            self._evict()
+        return job_id
+    
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a job (queued, running, finished or failed) with its result or error"""
+        with self._lock:
+            future = self._jobs.get(job_id)
+        if future is None:
+            return None
+        if not future.done():
+            return {'job_id': job_id, 'status': 'running' if future.running() else 'queued'}
+        error = future.exception()
+        if error is not None:
+            return {'job_id': job_id, 'status': 'failed', 'error': str(error)}
+        return {'job_id': job_id, 'status': 'finished', 'result': future.result()}
+    
+    def _evict(self) -> None:
+        """Forget the oldest finished jobs beyond max_jobs; pending jobs are always kept"""
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, future in self._jobs.items() if future.done()][:excess]:
+            del self._jobs[job_id]
+
+
+JOBS = JobQueue(Config.JOB_WORKERS, Config.JOB_MAX_KEPT)
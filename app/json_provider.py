@@ -0,0 +1,40 @@
+import orjson
+from typing import Any
+from flask.json.provider import DefaultJSONProvider
+
+# Emit numpy values and non-string keys (e.g. sheet row indexes) without conversion
+_BASE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson"""
+    
+    def _dumpb(self, obj: Any, indent: bool = False, sort_keys: bool = None, default=None) -> bytes:
+        """Serialize to UTF-8 JSON bytes"""
+        option = _BASE_OPTIONS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default or self.default, option=option)
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as a JSON string"""
+        return self._dumpb(
+            obj,
+            indent=bool(kwargs.get('indent')),
+            sort_keys=kwargs.get('sort_keys'),
+            default=kwargs.get('default')
+        ).decode('utf-8')
+    
+    def loads(self, s, **kwargs: Any) -> Any:
+        """Deserialize JSON text or UTF-8 bytes"""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        """Build a JSON response from the encoded bytes, skipping the str round trip"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._dumpb(obj, indent=indent) + b"\n", mimetype=self.mimetype)
@@ -1,7 +1,15 @@
 from app.parsers.pdf_parser import PDFParser
+from app.parsers.pymupdf_parser import PyMuPDFParser
 from app.parsers.word_parser import WordParser
 from app.parsers.excel_parser import ExcelParser
 from app.parsers.extractor import DataExtractor
-from app.parsers.openai_extractor import OpenAIExtractor
 
-__all__ = ['PDFParser', 'WordParser', 'ExcelParser', 'DataExtractor', 'OpenAIExtractor']
+__all__ = ['PDFParser', 'PyMuPDFParser', 'WordParser', 'ExcelParser', 'DataExtractor', 'OpenAIExtractor']
+
+
+def __getattr__(name):
+    # Import the OpenAI client stack only when it is actually requested
+    if name == 'OpenAIExtractor':
+        from app.parsers.openai_extractor import OpenAIExtractor
+        return OpenAIExtractor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
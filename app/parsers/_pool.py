@@ -0,0 +1,7 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# One process pool for CPU-bound parsing, shared by every parser in the process;
+# workers start on first use and are then reused across documents.
+MAX_POOL_WORKERS = min(8, os.cpu_count() or 1)
+POOL = ProcessPoolExecutor(max_workers=MAX_POOL_WORKERS)
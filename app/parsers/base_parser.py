@@ -1,10 +1,21 @@
+import io
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO, Union
+
+# A document on disk (its path) or already in memory (its bytes)
+Source = Union[str, bytes]
+
+
+def open_source(source: Source) -> Union[str, BinaryIO]:
+    """The path itself, or a fresh in-memory file over the bytes"""
+    # A new BytesIO per reader, so concurrent readers never share a file position
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
 
 class BaseParser(ABC):
     """Base class for document parsers"""
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: Source):
         self.file_path = file_path
         self.extracted_data = {}
     
@@ -1,57 +1,150 @@
+import datetime
 import openpyxl
-import pandas as pd
-from typing import Dict, Any, List
-from app.parsers.base_parser import BaseParser
+from openpyxl.utils import get_column_letter
+from typing import Dict, Any, Iterable, Iterator, List, Sequence, Tuple
+from app.parsers.base_parser import BaseParser, Source, open_source
+
+_EMPTY = ""
+
+
+def _cell_to_str(value: Any, _type=type) -> str:
+    """Stringify a cell value with fast paths for the common cell types"""
+    t = _type(value)
+    if t is str:
+        return value
+    if value is None:
+        return _EMPTY
+    if t is int:
+        return int.__repr__(value)
+    if t is float:
+        # repr keeps every significant digit ('g' would turn 2500000.0 into '2.5e+06')
+        return float.__repr__(value)
+    if t is datetime.datetime:
+        return value.isoformat(sep=' ', timespec='seconds')
+    return str(value)
+
 
 class ExcelParser(BaseParser):
     """Parser for Excel (.xlsx) documents"""
     
+    def __init__(self, file_path: Source):
+        super().__init__(file_path)
+        self._text_cache = None
+        # Set when only the text view is consumed; parse then skips row materialization
+        self._text_only = False
+    
     def parse(self) -> Dict[str, Any]:
         """Parse Excel file and extract structured data"""
+        wb = None
         try:
-            wb = openpyxl.load_workbook(self.file_path)
+            # Read-only mode streams rows instead of building the full cell model;
+            # extraction never writes back, so formulas, links and styles are not needed.
+            wb = openpyxl.load_workbook(open_source(self.file_path), read_only=True, data_only=True, keep_links=False)
+            if self._text_only:
+                # Stream row tuples straight into the text buffer; rows are not kept,
+                # so 'data' is left out and the counts only feed 'sheet_details'.
+                sheets_data = None
+                counts_by_sheet = {}
+                self._text_cache = self._sheets_to_text(self._counted_sheets(wb, counts_by_sheet))
+                sheet_details = {
+                    sheet_name: self._sheet_details(wb[sheet_name], counts['rows'], counts['cols'])
+                    for sheet_name, counts in counts_by_sheet.items()
+                }
+            else:
+                sheets_data, sheet_details = self._extract_all_sheets(wb)
+                # Build the text view from the rows already in memory so extract_text
+                # does not have to open and parse the workbook a second time.
+                self._text_cache = self._sheets_to_text(sheets_data.items())
             self.extracted_data = {
                 'file_type': 'Excel',
                 'sheets': list(wb.sheetnames),
-                'data': self._extract_all_sheets(wb),
-                'sheet_details': self._extract_sheet_details(wb)
+                'sheet_details': sheet_details
             }
-            wb.close()
+            if sheets_data is not None:
+                # Always sheet name -> list of rows, whenever present
+                self.extracted_data['data'] = sheets_data
             return self.extracted_data
         except Exception as e:
             raise Exception(f"Error parsing Excel file: {str(e)}")
+        finally:
+            if wb is not None:
+                wb.close()
     
     def extract_text(self) -> str:
         """Extract all text from Excel"""
+        if self._text_cache is not None:
+            return self._text_cache
         try:
-            df_dict = pd.read_excel(self.file_path, sheet_name=None)
-            text = ""
-            for sheet_name, df in df_dict.items():
-                text += f"\n--- SHEET: {sheet_name} ---\n"
-                text += df.to_string() + "\n"
-            return text
+            return self._sheets_to_text(self._sheets_iter())
         except Exception as e:
             raise Exception(f"Error extracting text from Excel: {str(e)}")
     
-    def _extract_all_sheets(self, wb) -> Dict[str, List[List[Any]]]:
-        """Extract data from all sheets"""
-        sheets_data = {}
+    def _sheets_iter(self) -> Iterator[Tuple[str, Iterable[Sequence[Any]]]]:
+        """Yield (sheet name, row tuples) streamed from a read-only workbook"""
+        wb = openpyxl.load_workbook(open_source(self.file_path), read_only=True, data_only=True, keep_links=False)
+        try:
+            for sheet_name in wb.sheetnames:
+                yield sheet_name, wb[sheet_name].iter_rows(values_only=True)
+        finally:
+            wb.close()
+    
+    def _counted_sheets(self, wb, summary: Dict[str, Dict[str, int]]) -> Iterator[Tuple[str, Iterable[Sequence[Any]]]]:
+        """Yield (sheet name, row tuples), recording row/column counts into summary"""
         for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            sheet_data = []
-            for row in ws.iter_rows(values_only=True):
-                sheet_data.append(list(row))
-            sheets_data[sheet_name] = sheet_data
-        return sheets_data
-    
-    def _extract_sheet_details(self, wb) -> Dict[str, Dict[str, Any]]:
-        """Extract detailed information about each sheet"""
+            counts = summary[sheet_name] = {'rows': 0, 'cols': 0}
+            yield sheet_name, self._counted_rows(wb[sheet_name], counts)
+    
+    def _counted_rows(self, ws, counts: Dict[str, int]) -> Iterator[Sequence[Any]]:
+        """Pass row tuples through once while counting rows and columns"""
+        rows = cols = 0
+        for row in ws.iter_rows(values_only=True):
+            rows += 1
+            if len(row) > cols:
+                cols = len(row)
+            yield row
+        counts['rows'] = rows
+        counts['cols'] = cols
+    
+    def _extract_all_sheets(self, wb) -> Tuple[Dict[str, List[List[Any]]], Dict[str, Dict[str, Any]]]:
+        """Extract data and dimensions from all sheets"""
+        # Sheets are read one after another from the already-open workbook: openpyxl's
+        # parsing holds the GIL, and a workbook per thread re-parses shared strings
+        sheets_data = {}
         details = {}
         for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            details[sheet_name] = {
-                'dimensions': ws.dimensions,
-                'max_row': ws.max_row,
-                'max_column': ws.max_column
-            }
-        return details
+            sheets_data[sheet_name], details[sheet_name] = self._read_sheet(wb[sheet_name])
+        return sheets_data, details
+    
+    def _read_sheet(self, ws) -> Tuple[List[List[Any]], Dict[str, Any]]:
+        """Read a sheet's rows and dimensions in a single pass"""
+        sheet_data = []
+        max_column = 0
+        for row in ws.iter_rows(values_only=True):
+            sheet_data.append(list(row))
+            max_column = max(max_column, len(row))
+        return sheet_data, self._sheet_details(ws, len(sheet_data), max_column)
+    
+    def _sheets_to_text(self, sheets: Iterable[Tuple[str, Iterable[Sequence[Any]]]]) -> str:
+        """Render sheet rows as tab-delimited text, one block per sheet"""
+        # Collect pieces and join once; repeated += on a growing str is quadratic
+        parts = []
+        for sheet_name, rows in sheets:
+            parts.append(f"\n--- SHEET: {sheet_name} ---\n")
+            for row in rows:
+                parts.append("\t".join(map(_cell_to_str, row)))
+                parts.append("\n")
+        return "".join(parts)
+    
+    def _sheet_details(self, ws, max_row: int, max_column: int) -> Dict[str, Any]:
+        """Describe a sheet from the row/column counts gathered while reading it"""
+        # max_row/max_column are unreliable on read-only sheets, so use the counts
+        # from the row pass; the stored dimension is only trusted when present.
+        try:
+            dimensions = ws.calculate_dimension()
+        except ValueError:
+            dimensions = f"A1:{get_column_letter(max_column)}{max_row}" if max_row and max_column else "A1:A1"
+        return {
+            'dimensions': dimensions,
+            'max_row': max_row,
+            'max_column': max_column
+        }
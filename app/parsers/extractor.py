@@ -1,25 +1,317 @@
+import os
 import re
-from typing import Dict, Any, List, Optional
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Any, List, Optional, Pattern, Tuple, Union
+from app.parsers.base_parser import Source
 from app.parsers.pdf_parser import PDFParser
+from app.parsers.pymupdf_parser import PyMuPDFParser, fitz
 from app.parsers.word_parser import WordParser
 from app.parsers.excel_parser import ExcelParser
 from app.config import Config
+from app.schemas import CRE_EXTRACTION_SCHEMA
+
+try:
+    import hyperscan
+except ImportError:
+    # Optional: without Hyperscan the combined ``re`` pattern is used instead
+    hyperscan = None
+
+_FLAGS = re.IGNORECASE | re.MULTILINE
+
+# Field definitions grouped by output category: (labels, value pattern).
+# A field matches ``<label>:<whitespace><value>`` for any of its labels.
+_FIELDS: Dict[str, Dict[str, Tuple[Tuple[str, ...], str]]] = {
+    'property_details': {
+        'property_address': (('Address', 'Location', 'Property'), r'([^\n]+)'),
+        'property_type': (('Property Type', 'Asset Class'), r'([^\n]+)'),
+        'square_footage': (('Square Feet', 'SF', 'Total Area'), r'([\d,]+)'),
+        'acres': (('Acres', 'Acreage', 'Land Area'), r'([\d,.]+)'),
+        'land_square_feet': (('Land Square Feet', 'Land SF', 'Land Area (SF)', 'Land Area(SF)'), r'([\d,]+)'),
+        'gross_building_area': (('Gross Building Area', 'GBA'), r'([\d,]+)'),
+        'net_rentable_area': (('Net Rentable Area', 'NRA'), r'([\d,]+)'),
+        'year_built': (('Year Built', 'Year Constructed'), r'(\d{4})'),
+        'units': (('Number of Units', 'Total Units'), r'(\d+)'),
+        'occupancy_rate': (('Occupancy Rate', 'Occupancy'), r'([\d.]+%)'),
+    },
+    'financial_metrics': {
+        'noi_annual': (('Net Operating Income', 'NOI'), r'\$?([\d,]+\.?\d*)'),
+        'stabilized_noi': (('Stabilized NOI', 'Stabilized Net Operating Income'), r'\$?([\d,]+\.?\d*)'),
+        'cap_rate': (('Cap Rate', 'Capitalization Rate'), r'([\d.]+)%?'),
+        'purchase_price': (('Purchase Price', 'Acquisition Price'), r'\$?([\d,]+\.?\d*)'),
+        'appraised_value': (('Appraised Value', 'Valuation'), r'\$?([\d,]+\.?\d*)'),
+        'annual_gross_income': (('Gross Income', 'Annual Revenue'), r'\$?([\d,]+\.?\d*)'),
+        'operating_expenses': (('Operating Expenses', 'OpEx'), r'\$?([\d,]+\.?\d*)'),
+        'debt_service': (('Debt Service', 'Annual Debt Service'), r'\$?([\d,]+\.?\d*)'),
+        'dscr': (('DSCR', 'Debt Service Coverage Ratio'), r'([\d.]+)'),
+        'irr': (('IRR', 'Internal Rate of Return'), r'([\d.]+)%?'),
+        'project_cost': (('Total Project Cost', 'Project Cost', 'Total Cost'), r'\$?([\d,]+\.?\d*)'),
+        'expected_exit_valuation': (('Expected Exit Valuation', 'Exit Valuation', 'Terminal Value'), r'\$?([\d,]+\.?\d*)'),
+    },
+    'loan_details': {
+        'loan_amount': (('Loan Amount', 'Credit Facility'), r'\$?([\d,]+\.?\d*)'),
+        'interest_rate': (('Interest Rate', 'Rate'), r'([\d.]+)%?'),
+        'loan_term_years': (('Loan Term', 'Amortization Period'), r'(\d+)\s*(?:year|month)'),
+        'loan_type': (('Loan Type', 'Facility Type'), r'([^\n]+)'),
+        'lender': (('Lender', 'Bank', 'Financial Institution'), r'([^\n]+)'),
+        'maturity_date': (('Maturity Date', 'Loan Maturity'), r'([^\n]+)'),
+        'ltv': (('LTV', 'Loan to Value'), r'([\d.]+)%?'),
+    },
+    'tenant_information': {
+        'major_tenants': (('Tenant', 'Anchor', 'Major Tenant'), r'([^\n]+)'),
+        'lease_terms': (('Lease Term', 'Remaining Term'), r'([^\n]+)'),
+        'tenant_quality': (('Tenant Quality', 'Credit Quality'), r'([^\n]+)'),
+    },
+    'market_analysis': {
+        'market': (('Market', 'Market Analysis', 'MSA'), r'([^\n]+)'),
+        'submarket': (('Submarket', 'Sub-market'), r'([^\n]+)'),
+        'comparable_properties': (('Comparable', 'Comp', 'Similar Properties'), r'([^\n]+)'),
+        'market_trends': (('Market Trend', 'Trend'), r'([^\n]+)'),
+    },
+    'risk_assessment': {
+        'identified_risks': (('Risk', 'Risk Factor', 'Concern'), r'([^\n]+)'),
+        'mitigation_strategies': (('Mitigation', 'Mitigation Strategy'), r'([^\n]+)'),
+    },
+}
+
+_FIELD_TO_CATEGORY: Dict[str, str] = {
+    name: category for category, fields in _FIELDS.items() for name in fields
+}
+
+# Item key used for each list-valued field in citation results
+_LIST_RESULT_KEYS: Dict[str, str] = {
+    'major_tenants': 'name',
+    'comparable_properties': 'property',
+    'market_trends': 'trend',
+    'identified_risks': 'risk',
+    'mitigation_strategies': 'strategy',
+}
+
+# Every per-field regex, compiled once at import time.
+# The stdlib ``re`` cache is small and cleared wholesale on overflow, so
+# relying on it across ~40 patterns per document recompiles constantly.
+_PATTERNS: Dict[str, Pattern] = {
+    name: re.compile(r'(?:%s):\s*%s' % ('|'.join(map(re.escape, labels)), value), _FLAGS)
+    for fields in _FIELDS.values() for name, (labels, value) in fields.items()
+}
+
+# (compiled pattern, result item key) for list-valued fields, resolved once here
+# rather than by inspecting the pattern source on every match.
+_LIST_PATTERNS: Dict[str, Tuple[Pattern, str]] = {
+    name: (_PATTERNS[name], key) for name, key in _LIST_RESULT_KEYS.items()
+}
+
+# Numeric type of each field whose value the extraction schema declares as a
+# number or integer; regex captures for these are converted after matching.
+_NUMERIC_FIELDS: Dict[str, Dict[str, type]] = {
+    category: {
+        name: int if 'integer' in value_type else float
+        for name in fields
+        for value_type in [CRE_EXTRACTION_SCHEMA['schema']['properties'][category]['properties'][name]
+                           .get('properties', {}).get('value', {}).get('type', [])]
+        if 'integer' in value_type or 'number' in value_type
+    }
+    for category, fields in _FIELDS.items()
+}
+
+# Every lowercased label. Every pattern needs "label:", so text containing
+# none of these cannot match anything and skips the scan outright.
+_LABEL_ANCHORS: Tuple[str, ...] = tuple(sorted({
+    label.lower() for fields in _FIELDS.values() for labels, _ in fields.values() for label in labels
+}))
+
+# Fields whose absence from the leading text window triggers scanning the next one
+_CRITICAL_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ('financial_metrics', 'noi_annual'),
+    ('loan_details', 'loan_amount'),
+)
+
+# Characters shared by consecutive extraction windows
+_WINDOW_OVERLAP = 1_000
+
+# Categories extracted by the single combined pass in _scan_fields
+_SINGLE_PASS_CATEGORIES = tuple(_FIELDS)
+
+# (label, field name, value pattern) for every single-pass label, longest
+# label first so that at a shared colon the most specific label wins
+# ("Cap Rate:" is a cap rate, not an interest rate).
+_SINGLE_PASS_BRANCHES: List[Tuple[str, str, str]] = sorted(
+    ((label, name, value)
+     for category in _SINGLE_PASS_CATEGORIES
+     for name, (labels, value) in _FIELDS[category].items()
+     for label in labels),
+    key=lambda branch: len(branch[0]), reverse=True
+)
+
+# Hits kept per single-pass field: list fields report up to five, scalars only the first
+_HIT_QUOTAS: Dict[str, int] = {
+    name: 5 if name in _LIST_RESULT_KEYS else 1
+    for category in _SINGLE_PASS_CATEGORIES for name in _FIELDS[category]
+}
+
+def _build_combined(branches: List[Tuple[str, str, str]]) -> Tuple[Pattern, Dict[int, Tuple[str, int]]]:
+    """Build one pattern matching every single-pass field at once.
+
+    Every field needs a colon right after its label, so the combined
+    pattern starts with a literal ``:`` (letting the regex engine skip
+    straight to colons) and checks labels with one fixed-width lookbehind
+    per label. The branches sit inside a lookahead so a long value never
+    hides a later ``label:`` on the same line.
+    """
+    alternatives = [
+        r'(?P<%s_%d>(?<=%s:)\s*%s)' % (name, i, re.escape(label), value)
+        for i, (label, name, value) in enumerate(branches)
+    ]
+    combined = re.compile(':(?=%s)' % '|'.join(alternatives), _FLAGS)
+    # Outer group index -> (field name, label length); the value is always
+    # the next group after the outer one.
+    lookup = {
+        combined.groupindex['%s_%d' % (name, i)]: (name, len(label))
+        for i, (label, name, value) in enumerate(branches)
+    }
+    return combined, lookup
+
+def _build_hyperscan(branches: List[Tuple[str, str, str]]):
+    """Compile every ``label:`` literal into a Hyperscan database, if available"""
+    if hyperscan is None:
+        return None
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[re.escape(label).encode() + b':' for label, name, value in branches],
+        ids=list(range(len(branches))),
+        elements=len(branches),
+        flags=hyperscan.HS_FLAG_CASELESS
+    )
+    return database
+
+_COMBINED, _BRANCHES = _build_combined(_SINGLE_PASS_BRANCHES)
+_HS_DATABASE = _build_hyperscan(_SINGLE_PASS_BRANCHES)
+
+# Value patterns matched right after a Hyperscan ``label:`` hit
+_VALUE_PATTERNS: Dict[str, Pattern] = {
+    name: re.compile(r'\s*' + value, _FLAGS)
+    for category in _SINGLE_PASS_CATEGORIES for name, (labels, value) in _FIELDS[category].items()
+}
+
+# Hyperscan scratch space is not thread-safe, so each thread allocates its own
+_hs_local = threading.local()
+
+def _hs_scratch():
+    """Return this thread's Hyperscan scratch space"""
+    scratch = getattr(_hs_local, 'scratch', None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_HS_DATABASE)
+    return scratch
+
+def _byte_to_char_offsets(data: bytes, offsets: List[int]) -> List[int]:
+    """Map sorted UTF-8 byte offsets that fall on character boundaries to str offsets"""
+    chars = previous = 0
+    result = []
+    for offset in offsets:
+        chars += len(data[previous:offset].decode('utf-8'))
+        previous = offset
+        result.append(chars)
+    return result
+
+@lru_cache(maxsize=256)
+def _compile(pattern: str) -> Pattern:
+    """Compile an ad-hoc pattern string, memoized for dynamic callers"""
+    return re.compile(pattern, _FLAGS)
+
+def _findall_item(match):
+    """Return what ``Pattern.findall`` would yield for this match"""
+    groups = match.groups('')
+    if not groups:
+        return match.group(0)
+    return groups[0] if len(groups) == 1 else groups
+
+@lru_cache(maxsize=256)
+def _result_key_for(source: str) -> str:
+    """Guess the result item key for an ad-hoc list pattern from its source"""
+    source = source.lower()
+    if "tenant" in source:
+        return "name"
+    elif "risk" in source:
+        return "risk"
+    elif "mitigation" in source or "strategy" in source:
+        return "strategy"
+    elif "trend" in source:
+        return "trend"
+    return "property"
+
+@lru_cache(maxsize=1)
+def _get_openai():
+    """Build the OpenAI extractor (and its HTTP client) once per process"""
+    from app.parsers.openai_extractor import OpenAIExtractor
+    return OpenAIExtractor()
+
+def _init_worker():
+    """Warm a batch worker: build the per-process scan state before the first file"""
+    # Patterns and the Hyperscan database are compiled at import; scratch space
+    # is per thread, so allocate it up front rather than on the first scan.
+    if _HS_DATABASE is not None:
+        _hs_scratch()
+
+def _extract_file(job: Tuple[Source, str, Optional[bool], bool]) -> Dict[str, Any]:
+    """Run extract_all for one (file path or bytes, file type, use_openai, include_raw) batch job"""
+    file_path, file_type, use_openai, include_raw = job
+    try:
+        return DataExtractor(file_path, file_type, use_openai=use_openai, include_raw=include_raw).extract_all()
+    except Exception as e:
+        return {'file_path': file_path if isinstance(file_path, str) else None, 'error': str(e)}
+
 
 class DataExtractor:
     """Extracts key CRE underwriting information from parsed documents"""
     
-    def __init__(self, file_path: str, file_type: str, use_openai: Optional[bool] = None):
+    def __init__(self, file_path: Source, file_type: str, use_openai: Optional[bool] = None, max_chars: int = 200_000,
+                 include_raw: bool = False):
         self.file_path = file_path
         self.file_type = file_type
         self.use_openai = use_openai if use_openai is not None else Config.USE_OPENAI_EXTRACTION
+        self.max_chars = max_chars
+        self.include_raw = include_raw
         self.parser = self._get_parser()
+        if isinstance(self.parser, (ExcelParser, WordParser)):
+            # Both extraction paths only read the text view, so rows and
+            # paragraphs are materialized only when the caller asked for raw_data
+            self.parser._text_only = not include_raw
         self.raw_data = {}
         self.extracted_metrics = {}
     
+    @classmethod
+    def from_bytes(cls, data: bytes, file_type: str, **kwargs) -> 'DataExtractor':
+        """Extractor over a document already in memory, e.g. an upload; nothing touches disk"""
+        return cls(data, file_type, **kwargs)
+    
+    @staticmethod
+    def extract_batch(paths: List[Tuple[Source, str]], use_openai: Optional[bool] = None,
+                      include_raw: bool = False) -> List[Dict[str, Any]]:
+        """Extract several (file path or bytes, file type) documents in parallel.
+        
+        Results keep input order; a file that fails yields {'file_path', 'error'}.
+        """
+        jobs = [(file_path, file_type, use_openai, include_raw) for file_path, file_type in paths]
+        if len(jobs) < 2:
+            return [_extract_file(job) for job in jobs]
+        
+        if (use_openai if use_openai is not None else Config.USE_OPENAI_EXTRACTION) and Config.validate_openai_config():
+            # Waiting on the API dominates, so threads overlap the round trips and
+            # share one extractor and its connection pool
+            with ThreadPoolExecutor(max_workers=min(Config.OPENAI_MAX_ASYNC, len(jobs))) as executor:
+                return list(executor.map(_extract_file, jobs))
+        
+        workers = min(os.cpu_count() or 1, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            return list(executor.map(_extract_file, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+    
     def _get_parser(self):
         """Get appropriate parser based on file type"""
         if self.file_type.lower() == 'pdf':
-            return PDFParser(self.file_path)
+            # PyMuPDF is much faster; it hands off to pdfplumber when its text looks degenerate
+            return PyMuPDFParser(self.file_path) if fitz is not None else PDFParser(self.file_path)
         elif self.file_type.lower() == 'word':
             return WordParser(self.file_path)
         elif self.file_type.lower() == 'excel':
@@ -37,244 +329,357 @@ class DataExtractor:
         # Use OpenAI if enabled and configured
         if self.use_openai and Config.validate_openai_config():
             try:
-                from app.parsers.openai_extractor import OpenAIExtractor
-                openai_extractor = OpenAIExtractor()
+                openai_extractor = _get_openai()
                 self.extracted_metrics = openai_extractor.extract_with_confidence(text)
                 extraction_method = 'openai'
             except Exception as e:
                 # Fallback to regex extraction if OpenAI fails and fallback is enabled
                 if Config.ENABLE_FALLBACK:
-                    self.extracted_metrics = self._extract_metrics_regex(text)
+                    self.extracted_metrics = self._extract_metrics_windowed(text)
                     extraction_method = 'regex_fallback'
                 else:
                     raise Exception(f"OpenAI extraction failed and fallback disabled: {str(e)}")
         else:
             # Use regex-based extraction
-            self.extracted_metrics = self._extract_metrics_regex(text)
+            self.extracted_metrics = self._extract_metrics_windowed(text)
             extraction_method = 'regex'
         
-        return {
+        result = {
             'file_info': {
                 'file_type': self.file_type,
                 'pages': self.raw_data.get('pages') or len(self.raw_data.get('sheets', [])),
-                'file_path': self.file_path,
+                # In-memory documents have no path
+                'file_path': self.file_path if isinstance(self.file_path, str) else None,
                 'extraction_method': extraction_method
             },
-            'raw_data': self.raw_data,
             'extracted_metrics': self.extracted_metrics
         }
+        if self.include_raw:
+            result['raw_data'] = self.raw_data
+        return result
+    
+    def _extract_metrics_windowed(self, text: str) -> Dict[str, Any]:
+        """Run regex extraction on successive windows of the text until key fields are found"""
+        # Underwriting facts sit near the front (summary, term sheet), so later
+        # windows are only scanned while a critical field is still missing.
+        end = self._window_end(text, 0, 0)
+        metrics = self._extract_metrics_regex(text[:end])
+        while end < len(text) and not self._has_critical_fields(metrics):
+            # Restart a few lines back so a label whose value sits on the next
+            # line is seen together with it
+            start = max(0, end - _WINDOW_OVERLAP)
+            line_break = text.find('\n', start, end - 1)
+            if line_break != -1:
+                start = line_break + 1
+            end = self._window_end(text, start, end)
+            self._fill_missing(metrics, self._extract_metrics_regex(text[start:end]))
+        return metrics
+    
+    def _window_end(self, text: str, start: int, min_end: int) -> int:
+        """End of a window covering up to max_chars new characters past min_end"""
+        end = max(start, min_end) + self.max_chars
+        if end >= len(text):
+            return len(text)
+        # Cutting at a line break keeps single-line values from being truncated
+        line_break = text.rfind('\n', min_end, end)
+        return line_break + 1 if line_break != -1 else end
+    
+    def _has_critical_fields(self, metrics: Dict[str, Any]) -> bool:
+        """Whether every field in _CRITICAL_FIELDS has a value"""
+        return all(metrics[category][name]['value'] is not None for category, name in _CRITICAL_FIELDS)
+    
+    def _fill_missing(self, metrics: Dict[str, Any], more: Dict[str, Any]) -> None:
+        """Copy fields found in a later window into the ones still empty"""
+        for category in _FIELDS:
+            fields = metrics[category]
+            for name, found in more[category].items():
+                current = fields[name]
+                if isinstance(current, list):
+                    if not current and found:
+                        fields[name] = found
+                elif current['value'] is None and found['value'] is not None:
+                    fields[name] = found
     
     def _extract_metrics_regex(self, text: str) -> Dict[str, Any]:
         """Extract metrics using regex patterns with citation support"""
-        return {
-            'property_details': self._extract_property_details_with_citations(text),
-            'financial_metrics': self._extract_financial_metrics_with_citations(text),
-            'loan_details': self._extract_loan_details_with_citations(text),
-            'tenant_information': {
-                'major_tenants': self._find_multiple_patterns_with_citations(text, r'(?:Tenant|Anchor|Major Tenant):\s*([^\n]+)', 5),
-                'lease_terms': self._find_pattern_with_citation(text, r'(?:Lease Term|Remaining Term):\s*([^\n]+)', 0),
-                'tenant_quality': self._find_pattern_with_citation(text, r'(?:Tenant Quality|Credit Quality):\s*([^\n]+)', 0)
-            },
-            'market_analysis': self._extract_market_analysis_with_citations(text),
-            'risk_assessment': {
-                'identified_risks': self._find_multiple_patterns_with_citations(text, r'(?:Risk|Risk Factor|Concern):\s*([^\n]+)', 5),
-                'mitigation_strategies': self._find_multiple_patterns_with_citations(text, r'(?:Mitigation|Mitigation Strategy):\s*([^\n]+)', 5)
-            },
-            'extraction_metadata': {
-                'confidence_score': 0.0,
-                'missing_fields': [],
-                'fields_with_citations': 0,
-                'fields_without_citations': 0,
-                'citation_coverage_percent': 0.0
+        # Every field needs a "label:" match, so cheap substring checks rule out
+        # text that cannot match before any regex runs.
+        if ':' not in text:
+            return self._empty_metrics()
+        lowered = text.lower()
+        if not any(anchor in lowered for anchor in _LABEL_ANCHORS):
+            return self._empty_metrics()
+        
+        metrics = self._extract_all_with_citations(text)
+        self._convert_numeric(metrics)
+        return self._materialize(text, metrics)
+    
+    def _extract_all_with_citations(self, text: str) -> Dict[str, Any]:
+        """Extract every category's fields with citations from one combined scan"""
+        metrics = self._empty_metrics()
+        for name, field_hits in self._scan_fields(text).items():
+            fields = metrics[_FIELD_TO_CATEGORY[name]]
+            if name in _LIST_RESULT_KEYS:
+                fields[name] = self._all_citations(text, field_hits, _LIST_RESULT_KEYS[name], 5)
+            else:
+                fields[name] = self._first_citation(text, field_hits)
+        return metrics
+    
+    def _convert_numeric(self, metrics: Dict[str, Any]) -> None:
+        """Turn numeric captures into numbers, keeping the matched string as raw_value"""
+        for category, numeric_fields in _NUMERIC_FIELDS.items():
+            fields = metrics[category]
+            for name, number_type in numeric_fields.items():
+                citation = fields[name]
+                raw = citation['value']
+                if raw is None:
+                    continue
+                cleaned = raw.replace(',', '').rstrip('%')
+                try:
+                    number = number_type(cleaned)
+                except ValueError:
+                    try:
+                        number = float(cleaned)
+                    except ValueError:
+                        continue
+                citation['value'] = number
+                citation['raw_value'] = raw
+    
+    def _empty_metrics(self) -> Dict[str, Any]:
+        """Return the regex result structure with every field unset"""
+        metrics = {
+            category: {
+                name: [] if name in _LIST_RESULT_KEYS else {"value": None, "unit": None, "source_text": None}
+                for name in fields
             }
+            for category, fields in _FIELDS.items()
+        }
+        metrics['financial_metrics']['expected_rents'] = []
+        metrics['extraction_metadata'] = {
+            'confidence_score': 0.0,
+            'missing_fields': [],
+            'fields_with_citations': 0,
+            'fields_without_citations': 0,
+            'citation_coverage_percent': 0.0
         }
+        return metrics
     
     def _extract_property_details(self, text: str) -> Dict[str, Optional[str]]:
         """Extract property details like address, type, size"""
         details = {
-            'property_address': self._find_pattern(text, r'(?:Address|Location|Property):\s*([^\n]+)', 0),
-            'property_type': self._find_pattern(text, r'(?:Property Type|Asset Class):\s*([^\n]+)', 0),
-            'square_footage': self._find_pattern(text, r'(?:Square Feet|SF|Total Area):\s*([\d,]+)', 0),
-            'year_built': self._find_pattern(text, r'(?:Year Built|Year Constructed):\s*(\d{4})', 0),
-            'units': self._find_pattern(text, r'(?:Number of Units|Total Units):\s*(\d+)', 0),
-            'occupancy_rate': self._find_pattern(text, r'(?:Occupancy Rate|Occupancy):\s*([\d.]+%)', 0)
+            'property_address': self._find_pattern(text, _PATTERNS['property_address'], 0),
+            'property_type': self._find_pattern(text, _PATTERNS['property_type'], 0),
+            'square_footage': self._find_pattern(text, _PATTERNS['square_footage'], 0),
+            'year_built': self._find_pattern(text, _PATTERNS['year_built'], 0),
+            'units': self._find_pattern(text, _PATTERNS['units'], 0),
+            'occupancy_rate': self._find_pattern(text, _PATTERNS['occupancy_rate'], 0)
         }
         return {k: v for k, v in details.items() if v}
     
-    def _extract_property_details_with_citations(self, text: str) -> Dict[str, Any]:
-        """Extract property details with source citations"""
-        details = {
-            'property_address': self._find_pattern_with_source(text, r'(?:Address|Location|Property):\s*([^\n]+)', 0),
-            'property_type': self._find_pattern_with_source(text, r'(?:Property Type|Asset Class):\s*([^\n]+)', 0),
-            'square_footage': self._find_pattern_with_source(text, r'(?:Square Feet|SF|Total Area):\s*([\d,]+)', 0),
-            'acres': self._find_pattern_with_source(text, r'(?:Acres|Acreage|Land Area):\s*([\d,.]+)', 0),
-            'land_square_feet': self._find_pattern_with_source(text, r'(?:Land Square Feet|Land SF|Land Area\s*\(SF\)):\s*([\d,]+)', 0),
-            'gross_building_area': self._find_pattern_with_source(text, r'(?:Gross Building Area|GBA):\s*([\d,]+)', 0),
-            'net_rentable_area': self._find_pattern_with_source(text, r'(?:Net Rentable Area|NRA):\s*([\d,]+)', 0),
-            'year_built': self._find_pattern_with_source(text, r'(?:Year Built|Year Constructed):\s*(\d{4})', 0),
-            'units': self._find_pattern_with_source(text, r'(?:Number of Units|Total Units):\s*(\d+)', 0),
-            'occupancy_rate': self._find_pattern_with_source(text, r'(?:Occupancy Rate|Occupancy):\s*([\d.]+%)', 0)
-        }
-        return details
-    
     def _extract_financial_metrics(self, text: str) -> Dict[str, Optional[str]]:
         """Extract financial metrics like NOI, cap rate, valuations"""
         metrics = {
-            'noi_annual': self._find_pattern(text, r'(?:Net Operating Income|NOI):\s*\$?([\d,]+\.?\d*)', 0),
-            'cap_rate': self._find_pattern(text, r'(?:Cap Rate|Capitalization Rate):\s*([\d.]+)%?', 0),
-            'purchase_price': self._find_pattern(text, r'(?:Purchase Price|Acquisition Price):\s*\$?([\d,]+\.?\d*)', 0),
-            'appraised_value': self._find_pattern(text, r'(?:Appraised Value|Valuation):\s*\$?([\d,]+\.?\d*)', 0),
-            'annual_gross_income': self._find_pattern(text, r'(?:Gross Income|Annual Revenue):\s*\$?([\d,]+\.?\d*)', 0),
-            'operating_expenses': self._find_pattern(text, r'(?:Operating Expenses|OpEx):\s*\$?([\d,]+\.?\d*)', 0),
-            'debt_service': self._find_pattern(text, r'(?:Debt Service|Annual Debt Service):\s*\$?([\d,]+\.?\d*)', 0),
-            'dscr': self._find_pattern(text, r'(?:DSCR|Debt Service Coverage Ratio):\s*([\d.]+)', 0),
-            'irr': self._find_pattern(text, r'(?:IRR|Internal Rate of Return):\s*([\d.]+)%?', 0)
+            'noi_annual': self._find_pattern(text, _PATTERNS['noi_annual'], 0),
+            'cap_rate': self._find_pattern(text, _PATTERNS['cap_rate'], 0),
+            'purchase_price': self._find_pattern(text, _PATTERNS['purchase_price'], 0),
+            'appraised_value': self._find_pattern(text, _PATTERNS['appraised_value'], 0),
+            'annual_gross_income': self._find_pattern(text, _PATTERNS['annual_gross_income'], 0),
+            'operating_expenses': self._find_pattern(text, _PATTERNS['operating_expenses'], 0),
+            'debt_service': self._find_pattern(text, _PATTERNS['debt_service'], 0),
+            'dscr': self._find_pattern(text, _PATTERNS['dscr'], 0),
+            'irr': self._find_pattern(text, _PATTERNS['irr'], 0)
         }
         return {k: v for k, v in metrics.items() if v}
     
-    def _extract_financial_metrics_with_citations(self, text: str) -> Dict[str, Any]:
-        """Extract financial metrics with citations"""
-        metrics = {
-            'noi_annual': self._find_pattern_with_source(text, r'(?:Net Operating Income|NOI):\s*\$?([\d,]+\.?\d*)', 0),
-            'stabilized_noi': self._find_pattern_with_source(text, r'(?:Stabilized NOI|Stabilized Net Operating Income):\s*\$?([\d,]+\.?\d*)', 0),
-            'cap_rate': self._find_pattern_with_source(text, r'(?:Cap Rate|Capitalization Rate):\s*([\d.]+)%?', 0),
-            'purchase_price': self._find_pattern_with_source(text, r'(?:Purchase Price|Acquisition Price):\s*\$?([\d,]+\.?\d*)', 0),
-            'appraised_value': self._find_pattern_with_source(text, r'(?:Appraised Value|Valuation):\s*\$?([\d,]+\.?\d*)', 0),
-            'annual_gross_income': self._find_pattern_with_source(text, r'(?:Gross Income|Annual Revenue):\s*\$?([\d,]+\.?\d*)', 0),
-            'operating_expenses': self._find_pattern_with_source(text, r'(?:Operating Expenses|OpEx):\s*\$?([\d,]+\.?\d*)', 0),
-            'debt_service': self._find_pattern_with_source(text, r'(?:Debt Service|Annual Debt Service):\s*\$?([\d,]+\.?\d*)', 0),
-            'dscr': self._find_pattern_with_source(text, r'(?:DSCR|Debt Service Coverage Ratio):\s*([\d.]+)', 0),
-            'irr': self._find_pattern_with_source(text, r'(?:IRR|Internal Rate of Return):\s*([\d.]+)%?', 0),
-            'project_cost': self._find_pattern_with_source(text, r'(?:Total Project Cost|Project Cost|Total Cost):\s*\$?([\d,]+\.?\d*)', 0),
-            'expected_exit_valuation': self._find_pattern_with_source(text, r'(?:Expected Exit Valuation|Exit Valuation|Terminal Value):\s*\$?([\d,]+\.?\d*)', 0),
-            'expected_rents': []
-        }
-        return metrics
-    
     def _extract_loan_details(self, text: str) -> Dict[str, Optional[str]]:
         """Extract loan terms and conditions"""
         details = {
-            'loan_amount': self._find_pattern(text, r'(?:Loan Amount|Credit Facility):\s*\$?([\d,]+\.?\d*)', 0),
-            'interest_rate': self._find_pattern(text, r'(?:Interest Rate|Rate):\s*([\d.]+)%?', 0),
-            'loan_term_years': self._find_pattern(text, r'(?:Loan Term|Amortization Period):\s*(\d+)\s*(?:year|month)', 0),
-            'loan_type': self._find_pattern(text, r'(?:Loan Type|Facility Type):\s*([^\n]+)', 0),
-            'lender': self._find_pattern(text, r'(?:Lender|Bank|Financial Institution):\s*([^\n]+)', 0),
-            'maturity_date': self._find_pattern(text, r'(?:Maturity Date|Loan Maturity):\s*([^\n]+)', 0),
-            'ltv': self._find_pattern(text, r'(?:LTV|Loan to Value):\s*([\d.]+)%?', 0)
+            'loan_amount': self._find_pattern(text, _PATTERNS['loan_amount'], 0),
+            'interest_rate': self._find_pattern(text, _PATTERNS['interest_rate'], 0),
+            'loan_term_years': self._find_pattern(text, _PATTERNS['loan_term_years'], 0),
+            'loan_type': self._find_pattern(text, _PATTERNS['loan_type'], 0),
+            'lender': self._find_pattern(text, _PATTERNS['lender'], 0),
+            'maturity_date': self._find_pattern(text, _PATTERNS['maturity_date'], 0),
+            'ltv': self._find_pattern(text, _PATTERNS['ltv'], 0)
         }
         return {k: v for k, v in details.items() if v}
     
-    def _extract_loan_details_with_citations(self, text: str) -> Dict[str, Any]:
-        """Extract loan details with citations"""
-        details = {
-            'loan_amount': self._find_pattern_with_source(text, r'(?:Loan Amount|Credit Facility):\s*\$?([\d,]+\.?\d*)', 0),
-            'interest_rate': self._find_pattern_with_source(text, r'(?:Interest Rate|Rate):\s*([\d.]+)%?', 0),
-            'loan_term_years': self._find_pattern_with_source(text, r'(?:Loan Term|Amortization Period):\s*(\d+)\s*(?:year|month)', 0),
-            'loan_type': self._find_pattern_with_source(text, r'(?:Loan Type|Facility Type):\s*([^\n]+)', 0),
-            'lender': self._find_pattern_with_source(text, r'(?:Lender|Bank|Financial Institution):\s*([^\n]+)', 0),
-            'maturity_date': self._find_pattern_with_source(text, r'(?:Maturity Date|Loan Maturity):\s*([^\n]+)', 0),
-            'ltv': self._find_pattern_with_source(text, r'(?:LTV|Loan to Value):\s*([\d.]+)%?', 0)
-        }
-        return details
-    
     def _extract_market_analysis(self, text: str) -> Dict[str, Any]:
         """Extract market-related information"""
         analysis = {
-            'market': self._find_pattern(text, r'(?:Market|Market Analysis|MSA):\s*([^\n]+)', 0),
-            'submarket': self._find_pattern(text, r'(?:Submarket|Sub-market):\s*([^\n]+)', 0),
-            'comparable_properties': self._find_multiple_patterns(text, r'(?:Comparable|Comp|Similar Properties):\s*([^\n]+)', 5),
-            'market_trends': self._find_multiple_patterns(text, r'(?:Market Trend|Trend):\s*([^\n]+)', 5)
+            'market': self._find_pattern(text, _PATTERNS['market'], 0),
+            'submarket': self._find_pattern(text, _PATTERNS['submarket'], 0),
+            'comparable_properties': self._find_multiple_patterns(text, _PATTERNS['comparable_properties'], 5),
+            'market_trends': self._find_multiple_patterns(text, _PATTERNS['market_trends'], 5)
         }
         return {k: v for k, v in analysis.items() if v}
     
-    def _extract_market_analysis_with_citations(self, text: str) -> Dict[str, Any]:
-        """Extract market analysis with citations"""
-        analysis = {
-            'market': self._find_pattern_with_source(text, r'(?:Market|Market Analysis|MSA):\s*([^\n]+)', 0),
-            'submarket': self._find_pattern_with_source(text, r'(?:Submarket|Sub-market):\s*([^\n]+)', 0),
-            'comparable_properties': self._find_multiple_patterns_with_sources(text, r'(?:Comparable|Comp|Similar Properties):\s*([^\n]+)', 5),
-            'market_trends': self._find_multiple_patterns_with_sources(text, r'(?:Market Trend|Trend):\s*([^\n]+)', 5)
-        }
-        return analysis
+    def _scan_fields(self, text: str) -> Dict[str, List[Tuple[int, int, int, int]]]:
+        """Scan the text once and bucket (value start, value end, start, end) hits by field"""
+        hits: Dict[str, List[Tuple[int, int, int, int]]] = {}
+        last_end: Dict[str, int] = {}
+        unfilled = len(_HIT_QUOTAS)
+        matches = self._iter_hyperscan_matches(text) if _HS_DATABASE is not None else self._iter_regex_matches(text)
+        for name, start, value_start, value_end, end in matches:
+            # Keep each field's hits non-overlapping, as a per-field finditer would
+            if start < last_end.get(name, 0):
+                continue
+            last_end[name] = end
+            field_hits = hits.setdefault(name, [])
+            if len(field_hits) == _HIT_QUOTAS[name]:
+                continue
+            # Offsets only: the value is sliced later, and only for hits that are used
+            field_hits.append((value_start, value_end, start, end))
+            if len(field_hits) == _HIT_QUOTAS[name]:
+                unfilled -= 1
+                if not unfilled:
+                    # Every field has all the hits it can report; stop reading
+                    break
+        return hits
+    
+    def _iter_regex_matches(self, text: str):
+        """Yield (field, start, value start, value end, end) for each combined-pattern match"""
+        for match in _COMBINED.finditer(text):
+            name, label_length = _BRANCHES[match.lastindex]
+            value_start, value_end = match.span(match.lastindex + 1)
+            yield name, match.start() - label_length, value_start, value_end, match.end(match.lastindex)
+    
+    def _iter_hyperscan_matches(self, text: str):
+        """Yield (field, start, value start, value end, end) using Hyperscan to locate every ``label:``"""
+        data = text.encode('utf-8')
+        labels_by_colon: Dict[int, List[int]] = {}
+        
+        def on_match(branch_id, start, end, flags, context):
+            labels_by_colon.setdefault(end - 1, []).append(branch_id)
+        
+        _HS_DATABASE.scan(data, match_event_handler=on_match, scratch=_hs_scratch())
+        
+        byte_offsets = sorted(labels_by_colon)
+        char_offsets = byte_offsets if len(data) == len(text) else _byte_to_char_offsets(data, byte_offsets)
+        for byte_offset, colon in zip(byte_offsets, char_offsets):
+            # Branch ids are ordered longest label first, like the combined pattern
+            for branch_id in sorted(labels_by_colon[byte_offset]):
+                label, name, value = _SINGLE_PASS_BRANCHES[branch_id]
+                match = _VALUE_PATTERNS[name].match(text, colon + 1)
+                if match:
+                    value_start, value_end = match.span(1)
+                    yield name, colon - len(label), value_start, value_end, match.end()
+                    break
+    
+    def _citation_span(self, text: str, start: int, end: int) -> Tuple[int, int]:
+        """Return offsets covering the hit plus up to 50 chars of surrounding context"""
+        return max(0, start - 50), min(len(text), end + 50)
+    
+    def _materialize(self, text: str, result: Any) -> Any:
+        """Replace citation spans with their source_text slices, in place"""
+        # Citations carry (start, end) offsets while extraction runs; text is
+        # sliced once here, only for the citations that survive into the result.
+        if isinstance(result, dict):
+            span = result.pop('span', None)
+            if span is not None:
+                result['source_text'] = text[span[0]:span[1]].strip()
+            for value in result.values():
+                if isinstance(value, (dict, list)):
+                    self._materialize(text, value)
+        elif isinstance(result, list):
+            for item in result:
+                self._materialize(text, item)
+        return result
+    
+    def _first_citation(self, text: str, field_hits: Optional[List[Tuple[int, int, int, int]]]) -> Dict[str, Optional[str]]:
+        """Build a value/citation dict from the first hit of a field"""
+        if field_hits:
+            value_start, value_end, start, end = field_hits[0]
+            value = text[value_start:value_end].strip()
+            if value:
+                return {"value": value, "unit": None, "span": self._citation_span(text, start, end)}
+        return {"value": None, "unit": None, "source_text": None}
     
-    def _find_pattern(self, text: str, pattern: str, index: int = 0) -> Optional[str]:
+    def _all_citations(self, text: str, field_hits: Optional[List[Tuple[int, int, int, int]]], key: str, limit: int = 5) -> List[Dict[str, Optional[str]]]:
+        """Build citation dicts for up to ``limit`` hits of a list field"""
+        results = []
+        for value_start, value_end, start, end in (field_hits or [])[:limit]:
+            value = text[value_start:value_end].strip()
+            if value:
+                results.append({key: value, "span": self._citation_span(text, start, end)})
+        return results
+    
+    def _find_first(self, pattern: Pattern, text: str):
+        """Return the first match, stopping the scan at the earliest hit"""
+        return pattern.search(text)
+    
+    def _find_nth(self, pattern: Pattern, text: str, n: int):
+        """Return the n-th (0-based) match without collecting the ones after it"""
+        if n == 0:
+            return self._find_first(pattern, text)
+        return next(islice(pattern.finditer(text), n, n + 1), None)
+    
+    def _find_pattern(self, text: str, pattern: Union[str, Pattern], index: int = 0) -> Optional[str]:
         """Find a single pattern in text"""
         try:
-            matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-            return matches[index] if matches and index < len(matches) else None
+            if isinstance(pattern, str):
+                pattern = _compile(pattern)
+            match = self._find_nth(pattern, text, index)
+            return _findall_item(match) if match is not None else None
         except:
             return None
     
-    def _find_multiple_patterns(self, text: str, pattern: str, limit: int = 5) -> List[str]:
+    def _find_multiple_patterns(self, text: str, pattern: Union[str, Pattern], limit: int = 5) -> List[str]:
         """Find multiple patterns in text"""
         try:
-            matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-            return [m.strip() for m in matches[:limit] if m.strip()]
+            if isinstance(pattern, str):
+                pattern = _compile(pattern)
+            matches = [_findall_item(match) for match in islice(pattern.finditer(text), limit)]
+            return [m.strip() for m in matches if m.strip()]
         except:
             return []
     
-    def _find_pattern_with_citation(self, text: str, pattern: str, index: int = 0) -> Dict[str, Optional[str]]:
+    def _find_pattern_with_citation(self, text: str, pattern: Union[str, Pattern], index: int = 0) -> Dict[str, Optional[str]]:
         """Find a single pattern in text and return with citation"""
         try:
-            matches = re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE)
-            match_list = list(matches)
+            if isinstance(pattern, str):
+                pattern = _compile(pattern)
+            match = self._find_nth(pattern, text, index)
             
-            if match_list and index < len(match_list):
-                match = match_list[index]
+            if match is not None:
                 value = match.group(1).strip() if match.lastindex and match.lastindex >= 1 else None
                 
                 if value:
-                    # Get surrounding context for source text (up to 100 chars before and after)
-                    start = max(0, match.start() - 50)
-                    end = min(len(text), match.end() + 50)
-                    source_text = text[start:end].strip()
-                    
-                    return {"value": value, "unit": None, "source_text": source_text}
+                    # Keep offsets of the surrounding context; _materialize slices it later
+                    return {"value": value, "unit": None, "span": self._citation_span(text, match.start(), match.end())}
             
             return {"value": None, "unit": None, "source_text": None}
         except:
             return {"value": None, "unit": None, "source_text": None}
     
-    def _find_multiple_patterns_with_citations(self, text: str, pattern: str, limit: int = 5) -> List[Dict[str, Optional[str]]]:
+    def _find_multiple_patterns_with_citations(self, text: str, pattern_entry: Union[Tuple[Pattern, str], str, Pattern], limit: int = 5) -> List[Dict[str, Optional[str]]]:
         """Find multiple patterns in text with citations"""
         try:
-            matches = list(re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE))
+            if isinstance(pattern_entry, tuple):
+                pattern, key = pattern_entry
+            else:
+                pattern = _compile(pattern_entry) if isinstance(pattern_entry, str) else pattern_entry
+                key = _result_key_for(pattern.pattern)
             results = []
             
-            for match in matches[:limit]:
+            for match in islice(pattern.finditer(text), limit):
                 value = match.group(1).strip() if match.lastindex and match.lastindex >= 1 else None
                 
                 if value:
-                    # Get surrounding context for citation
-                    start = max(0, match.start() - 50)
-                    end = min(len(text), match.end() + 50)
-                    source_text = text[start:end].strip()
-                    
-                    if "tenant" in pattern.lower():
-                        key = "name"
-                    elif "risk" in pattern.lower():
-                        key = "risk"
-                    elif "mitigation" in pattern.lower() or "strategy" in pattern.lower():
-                        key = "strategy"
-                    elif "trend" in pattern.lower():
-                        key = "trend"
-                    else:
-                        key = "property"
-
                     results.append({
                         key: value,
-                        "source_text": source_text
+                        "span": self._citation_span(text, match.start(), match.end())
                     })
             
             return results
         except:
             return []
 
-    def _find_pattern_with_source(self, text: str, pattern: str, index: int = 0) -> Dict[str, Optional[str]]:
+    def _find_pattern_with_source(self, text: str, pattern: Union[str, Pattern], index: int = 0) -> Dict[str, Optional[str]]:
         """Find a single pattern in text and return with source_text"""
-        return self._find_pattern_with_citation(text, pattern, index)
+        return self._materialize(text, self._find_pattern_with_citation(text, pattern, index))
 
-    def _find_multiple_patterns_with_sources(self, text: str, pattern: str, limit: int = 5) -> List[Dict[str, Optional[str]]]:
+    def _find_multiple_patterns_with_sources(self, text: str, pattern_entry: Union[Tuple[Pattern, str], str, Pattern], limit: int = 5) -> List[Dict[str, Optional[str]]]:
         """Find multiple patterns in text with source_text"""
-        return self._find_multiple_patterns_with_citations(text, pattern, limit)
+        return self._materialize(text, self._find_multiple_patterns_with_citations(text, pattern_entry, limit))
 
@@ -1,9 +1,195 @@
+import asyncio
 import json
+import orjson
 import os
-from typing import Dict, Any, Optional
-from openai import OpenAI, APIError
+import re
+import time
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from openai import AsyncOpenAI, OpenAI, APIConnectionError, APIError
 from app.config import Config
-from app.schemas import CRE_EXTRACTION_SCHEMA
+from app.schemas import CRE_EXTRACTION_SCHEMA, CRE_EXTRACTION_SCHEMA_JSON, CRE_BATCH_EXTRACTION_SCHEMA_JSON
+from app.parsers.rate_limiter import TokenBucketRateLimiter
+from app.parsers.response_cache import ResponseCache, SemanticCache
+
+try:
+    import httpx
+except ImportError:
+    # Optional: without httpx the OpenAI clients keep their default connection pools
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    # Optional: without h2 the API is reached over pooled HTTP/1.1 connections
+    HTTP2_AVAILABLE = False
+
+try:
+    import tiktoken
+except ImportError:
+    # Optional: without tiktoken, request sizes are estimated from character counts
+    tiktoken = None
+
+# Part of every cache key; bump whenever the prompts or CRE_EXTRACTION_SCHEMA
+# change so responses produced under the old template are no longer served.
+PROMPT_VERSION = "2"
+
+# Prompts are fixed module constants so the request prefix is byte-identical
+# on every call; only the document text that follows it varies.
+SYSTEM_PROMPT = """You are an expert commercial real estate analyst. Extract detailed CRE financial and operational metrics.
+
+CRITICAL REQUIREMENTS:
+1. For EVERY extracted value, include the exact source_text snippet from the document that supports it.
+2. If a field is not mentioned, set value to null and source_text to null (unit should be null when value is null).
+3. Always include a unit when the document provides one (e.g., USD, USD/SF/yr, %, acres, SF). If not stated, set unit to null.
+4. Use null for missing information, not empty strings.
+5. Convert currency values to numbers (remove $ and commas).
+6. Convert percentages to numbers (e.g., 5.5% -> 5.5) and set unit to "%".
+7. For dates, use YYYY-MM-DD format when possible.
+8. For lists, include up to 5-10 items as allowed and provide source_text for each item.
+9. Source_text must be an exact snippet from the document (25-200 characters).
+
+Return a valid JSON object matching the specified schema with complete source_text coverage for every non-null value."""
+
+USER_PROMPT_PREFIX = """Extract structured CRE data from the following document text. For each value, return value, unit, and source_text.
+
+Key fields to capture include (not limited to): total project cost, expected exit valuation, stabilized NOI, operating expenses,
+acres, land square feet, gross building area, net rentable area, and expected rents.
+
+Document text:
+"""
+
+BATCH_USER_PROMPT_PREFIX = """Extract structured CRE data from each of the following documents. For each value, return value, unit, and source_text.
+Return one entry in "documents" per document, in the order given; never mix facts between documents.
+
+Key fields to capture include (not limited to): total project cost, expected exit valuation, stabilized NOI, operating expenses,
+acres, land square feet, gross building area, net rentable area, and expected rents.
+
+"""
+
+_SCHEMA_FINGERPRINT = json.dumps(CRE_EXTRACTION_SCHEMA_JSON, sort_keys=True)
+
+# Shared by every request; only the user message is built per document
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# Leading characters of a document that are embedded for semantic cache lookups
+SEMANTIC_CACHE_CHARS = 8000
+
+# Rough characters per token, used to estimate request size when tiktoken is missing
+CHARS_PER_TOKEN = 4
+
+# Tokens reserved for the system prompt and instructions around the document text
+PROMPT_OVERHEAD_TOKENS = 2000
+
+# Floor for the document's share of the context, so a large OPENAI_MAX_TOKENS
+# can never leave a zero or negative budget
+MIN_DOCUMENT_TOKENS = 1000
+
+TRUNCATION_MARKER = "\n...[document content truncated]...\n"
+
+# Long documents are trimmed block by block: pages and sheets as emitted by the
+# parsers, else blank-line separated paragraphs, else lines (Word text has one
+# paragraph per line). Blocks are ranked by how many CRE figures and terms they contain.
+_BLOCK_BOUNDARY = re.compile(r'(?=\n--- (?:PAGE \d+|SHEET: [^\n]*) ---\n)')
+_PARAGRAPH_BOUNDARY = re.compile(r'(?<=\n)(?=\s*\n)')
+_LINE_BOUNDARY = re.compile(r'(?<=\n)')
+_CRE_TERMS = re.compile(
+    r'\$|%|\bNOI\b|\bcap(?:italization)?\s+rate|\bSF\b|\bsq\.?\s*f(?:ee)?t\b|square\s+f(?:ee|oo)t|\bacres?\b'
+    r'|\bDSCR\b|\bLTV\b|\bIRR\b|\boccupan|\brent|\bloan\b|\binterest\s+rate|\bpurchase\s+price|\bappraise',
+    re.IGNORECASE
+)
+
+
+# Connection pool shared by every request the process sends to the API
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
+HTTP_TIMEOUT_SECONDS = 60
+
+
+def _http_options() -> Dict[str, Any]:
+    """httpx client settings shared by the sync and async API clients"""
+    return {
+        'http2': HTTP2_AVAILABLE,
+        'limits': httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        'timeout': HTTP_TIMEOUT_SECONDS
+    }
+
+
+@lru_cache(maxsize=1)
+def _get_client(api_key: str) -> OpenAI:
+    """Process-wide OpenAI client, so TCP/TLS connections are reused across extractors"""
+    http_client = httpx.Client(**_http_options()) if httpx is not None else None
+    return OpenAI(api_key=api_key, timeout=HTTP_TIMEOUT_SECONDS, http_client=http_client)
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """tiktoken encoding for a model, loaded once; None without tiktoken"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Models newer than the installed tiktoken
+        return tiktoken.get_encoding('o200k_base')
+
+
+def _schema_field_paths(schema: Dict[str, Any]) -> Tuple[Tuple[Tuple[str, ...], ...], Tuple[Tuple[str, ...], ...]]:
+    """Key paths of the value/citation fields and the cited list fields in a JSON schema"""
+    scalar_paths = []
+    list_paths = []
+    
+    def walk(node: Dict[str, Any], path: Tuple[str, ...]) -> None:
+        for key, child in node.get('properties', {}).items():
+            child_path = path + (key,)
+            if child.get('type') == 'array':
+                if 'source_text' in child.get('items', {}).get('properties', {}):
+                    list_paths.append(child_path)
+            elif 'value' in child.get('properties', {}):
+                scalar_paths.append(child_path)
+            else:
+                walk(child, child_path)
+    
+    walk(schema['schema'], ())
+    return tuple(scalar_paths), tuple(list_paths)
+
+
+# Walked once at import; the counters below loop over these instead of
+# recursing through every response
+_SCALAR_PATHS, _LIST_PATHS = _schema_field_paths(CRE_EXTRACTION_SCHEMA)
+# (path, dotted name) pairs, so missing_fields entries are not re-joined per response
+_SCALAR_FIELDS = tuple((path, '.'.join(path)) for path in _SCALAR_PATHS)
+_LIST_FIELDS = tuple((path, '.'.join(path)) for path in _LIST_PATHS)
+
+
+def _empty_value(node: Dict[str, Any]) -> Any:
+    """Empty instance of a schema node: null leaves, empty lists, zeroed counters"""
+    if 'properties' in node:
+        return {key: _empty_value(child) for key, child in node['properties'].items()}
+    node_type = node.get('type')
+    if node_type == 'array':
+        return []
+    if node_type == 'number':
+        return 0.0
+    if node_type == 'integer':
+        return 0
+    return None
+
+
+# Serialized once from the schema, so empty responses always match its shape
+_EMPTY_RESPONSE_JSON = orjson.dumps(_empty_value(CRE_EXTRACTION_SCHEMA['schema']))
+
+
+def _lookup_path(data: Any, path: Tuple[str, ...]) -> Any:
+    """Follow path through nested dicts, returning None where it breaks off"""
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
 
 class OpenAIExtractor:
     """Extract and structure CRE data using OpenAI's API with JSON mode"""
@@ -12,9 +198,27 @@ class OpenAIExtractor:
         if not Config.validate_openai_config():
             raise ValueError("OpenAI API key not configured. Set OPENAI_API_KEY environment variable.")
         
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.client = _get_client(Config.OPENAI_API_KEY)
         self.model = Config.OPENAI_MODEL
         self.max_tokens = Config.OPENAI_MAX_TOKENS
+        # Hash the fixed request parts (prompt version, model, schema, system prompt) once;
+        # cache keys then only hash this digest and the document message
+        self._request_key_prefix = ResponseCache.make_key(
+            PROMPT_VERSION, self.model, str(self.max_tokens), _SCHEMA_FINGERPRINT, SYSTEM_PROMPT
+        )
+        self._semantic_namespace = ResponseCache.make_key(
+            PROMPT_VERSION, self.model, str(self.max_tokens), _SCHEMA_FINGERPRINT, Config.OPENAI_EMBEDDING_MODEL
+        )
+        self.cache = ResponseCache(Config.OPENAI_CACHE_PATH, Config.OPENAI_CACHE_TTL_SECONDS) if Config.OPENAI_CACHE_ENABLED else None
+        self.batch_size = Config.OPENAI_BATCH_SIZE
+        self.semantic_cache = None
+        if Config.OPENAI_SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = SemanticCache(
+                Config.OPENAI_CACHE_PATH, Config.OPENAI_CACHE_TTL_SECONDS, Config.OPENAI_SEMANTIC_CACHE_THRESHOLD
+            )
+        # (event loop, AsyncOpenAI client, rate limiter), created on first async call;
+        # the client's connection pool and the limiter's lock belong to that loop
+        self._async_state = None
     
     def extract_structured_data(self, text: str) -> Dict[str, Any]:
         """
@@ -28,47 +232,29 @@ class OpenAIExtractor:
             # Chunk text if too large (accounting for tokens)
             text = self._prepare_text(text)
             
+            messages = self._build_messages(text)
+            
+            cached, cache_key, embedding = self._lookup_cached(text, messages)
+            if cached is not None:
+                return cached
+            
             response = self.client.chat.completions.create(
                 model=self.model,
                 max_tokens=self.max_tokens,
-                response_format={"type": "json_schema", "json_schema": CRE_EXTRACTION_SCHEMA},
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert commercial real estate analyst. Extract detailed CRE financial and operational metrics.
-
-CRITICAL REQUIREMENTS:
-1. For EVERY extracted value, include the exact source_text snippet from the document that supports it.
-2. If a field is not mentioned, set value to null and source_text to null (unit should be null when value is null).
-3. Always include a unit when the document provides one (e.g., USD, USD/SF/yr, %, acres, SF). If not stated, set unit to null.
-4. Use null for missing information, not empty strings.
-5. Convert currency values to numbers (remove $ and commas).
-6. Convert percentages to numbers (e.g., 5.5% -> 5.5) and set unit to "%".
-7. For dates, use YYYY-MM-DD format when possible.
-8. For lists, include up to 5-10 items as allowed and provide source_text for each item.
-9. Source_text must be an exact snippet from the document (25-200 characters).
-
-Return a valid JSON object matching the specified schema with complete source_text coverage for every non-null value."""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""Extract structured CRE data from the following document text. For each value, return value, unit, and source_text.
-
-Key fields to capture include (not limited to): total project cost, expected exit valuation, stabilized NOI, operating expenses,
-acres, land square feet, gross building area, net rentable area, and expected rents.
-
-Document text:
-{text}
-
-Remember: EVERY non-null value must have a corresponding source_text snippet from the document."""
-                    }
-                ]
+                response_format={"type": "json_schema", "json_schema": CRE_EXTRACTION_SCHEMA_JSON},
+                messages=messages,
+                stream=True
             )
             
-            # Parse the JSON response
-            result = json.loads(response.choices[0].message.content)
+            # Parse the JSON response (orjson raises a json.JSONDecodeError subclass)
+            result = orjson.loads(self._read_stream(response))
+            self._store_cached(cache_key, embedding, result)
             return result
             
+        except APIConnectionError as e:
+            # A dropped pool keeps failing; start over with fresh connections
+            self._recycle_connections()
+            raise Exception(f"OpenAI API error: {str(e)}")
         except APIError as e:
             raise Exception(f"OpenAI API error: {str(e)}")
         except json.JSONDecodeError as e:
@@ -76,80 +262,391 @@ Remember: EVERY non-null value must have a corresponding source_text snippet fro
         except Exception as e:
             raise Exception(f"Error extracting data with OpenAI: {str(e)}")
     
-    def _prepare_text(self, text: str, max_chars: int = 16000) -> str:
+    async def extract_structured_data_async(self, text: str) -> Dict[str, Any]:
         """
-        Prepare text for OpenAI API by truncating if necessary.
-        Approximately 16k characters = 4k tokens for GPT models
+        Async variant of extract_structured_data that waits on the requests/tokens
+        per minute limits before calling the API, so many documents can run concurrently.
         """
-        if len(text) > max_chars:
-            # Keep the beginning and end, as they often contain important summaries
-            mid_point = max_chars // 2
-            text = text[:mid_point] + "\n...[document content truncated]...\n" + text[-mid_point:]
+        if not text or len(text.strip()) == 0:
+            return self._get_empty_response()
         
-        return text
+        try:
+            text = self._prepare_text(text)
+            messages = self._build_messages(text)
+            
+            # Cache lookups hit SQLite and possibly the embeddings API; keep them off the loop
+            cached, cache_key, embedding = await asyncio.to_thread(self._lookup_cached, text, messages)
+            if cached is not None:
+                return cached
+            
+            client, limiter = self._get_async_client()
+            await limiter.acquire(self._estimate_tokens(messages))
+            response = await client.chat.completions.create(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                response_format={"type": "json_schema", "json_schema": CRE_EXTRACTION_SCHEMA_JSON},
+                messages=messages,
+                stream=True
+            )
+            
+            result = orjson.loads(await self._read_stream_async(response))
+            await asyncio.to_thread(self._store_cached, cache_key, embedding, result)
+            return result
+            
+        except APIConnectionError as e:
+            # A dropped pool keeps failing; start over with fresh connections
+            self._recycle_connections()
+            raise Exception(f"OpenAI API error: {str(e)}")
+        except APIError as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+        except json.JSONDecodeError as e:
+            raise Exception(f"Failed to parse OpenAI response as JSON: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error extracting data with OpenAI: {str(e)}")
+    
+    async def extract_many_async(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extract structured CRE data for several documents concurrently, at most
+        OPENAI_MAX_ASYNC requests in flight. Results are returned in input order.
+        """
+        semaphore = asyncio.Semaphore(Config.OPENAI_MAX_ASYNC)
+        
+        async def bounded(text: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.extract_structured_data_async(text)
+        
+        return list(await asyncio.gather(*(bounded(text) for text in texts)))
+    
+    def extract_structured_data_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extract structured CRE data for several documents, packing small ones into shared requests.
+        Results are returned in input order.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        pending: List[Tuple[int, str]] = []
+        for index, text in enumerate(texts):
+            if not text or len(text.strip()) == 0:
+                results[index] = self._get_empty_response()
+                continue
+            prepared = self._prepare_text(text)
+            if len(prepared) > Config.OPENAI_BATCH_DOC_MAX_CHARS:
+                # Too large to share one response token budget with other documents
+                results[index] = self.extract_structured_data(text)
+                continue
+            cached = self.cache.get(self._request_key(self._build_messages(prepared))) if self.cache is not None else None
+            if cached is not None:
+                results[index] = cached
+                continue
+            pending.append((index, prepared))
+        
+        while pending:
+            size = self._group_size()
+            group, pending = pending[:size], pending[size:]
+            for (index, _), result in zip(group, self._extract_group(group)):
+                results[index] = result
+        return results
+    
+    def submit_batch(self, texts: List[str], out_path: str) -> str:
+        """
+        Queue documents on the OpenAI Batch API (half price, results within 24h) for
+        non-interactive ingestion. Writes the request JSONL to out_path and returns the batch id.
+        """
+        try:
+            directory = os.path.dirname(out_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(out_path, 'wb') as f:
+                for index, text in enumerate(texts):
+                    if not text or len(text.strip()) == 0:
+                        continue
+                    f.write(orjson.dumps({
+                        "custom_id": f"doc-{index}",
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": self.model,
+                            "max_tokens": self.max_tokens,
+                            "response_format": {"type": "json_schema", "json_schema": CRE_EXTRACTION_SCHEMA_JSON},
+                            "messages": self._build_messages(self._prepare_text(text))
+                        }
+                    }))
+                    f.write(b"\n")
+            
+            with open(out_path, 'rb') as f:
+                batch_file = self.client.files.create(file=f, purpose="batch")
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+                metadata={"documents": str(len(texts))}
+            )
+            return batch.id
+        except APIError as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error submitting OpenAI batch: {str(e)}")
+    
+    def poll_batch(self, batch_id: str) -> Optional[List[Optional[Dict[str, Any]]]]:
+        """
+        Results of a submitted batch in input order, or None while it is still running.
+        Documents whose request failed come back as None.
+        """
+        try:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in ("validating", "in_progress", "finalizing"):
+                return None
+            if batch.status != "completed":
+                raise Exception(f"batch {batch_id} ended with status '{batch.status}'")
+            
+            document_count = int(batch.metadata["documents"])
+            results: List[Optional[Dict[str, Any]]] = [self._get_empty_response() for _ in range(document_count)]
+            answered = set()
+            if batch.output_file_id:
+                for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                    if not line.strip():
+                        continue
+                    record = orjson.loads(line)
+                    index = int(record["custom_id"].split("-", 1)[1])
+                    answered.add(index)
+                    response = record.get("response") or {}
+                    if record.get("error") or response.get("status_code") != 200:
+                        results[index] = None
+                        continue
+                    results[index] = orjson.loads(response["body"]["choices"][0]["message"]["content"])
+            if batch.error_file_id:
+                for line in self.client.files.content(batch.error_file_id).text.splitlines():
+                    if line.strip():
+                        index = int(orjson.loads(line)["custom_id"].split("-", 1)[1])
+                        if index not in answered:
+                            results[index] = None
+            return results
+        except APIError as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+        except json.JSONDecodeError as e:
+            raise Exception(f"Failed to parse OpenAI response as JSON: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error reading OpenAI batch: {str(e)}")
+    
+    def _extract_group(self, group: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+        """Extract a group of prepared documents with one request, or singly on a bad reply"""
+        if len(group) == 1:
+            return [self.extract_structured_data(group[0][1])]
+        
+        document_sections = "".join(
+            f"### DOC {number}\n{text}\n\n" for number, (_, text) in enumerate(group, 1)
+        )
+        try:
+            started = time.monotonic()
+            response = self.client.chat.completions.create(
+                model=self.model,
+                # One document's budget would cut the combined reply short
+                max_tokens=len(group) * Config.OPENAI_BATCH_DOC_MAX_TOKENS,
+                response_format={"type": "json_schema", "json_schema": CRE_BATCH_EXTRACTION_SCHEMA_JSON},
+                messages=[
+                    _SYSTEM_MESSAGE,
+                    {"role": "user", "content": BATCH_USER_PROMPT_PREFIX + document_sections}
+                ],
+                stream=True
+            )
+            content = self._read_stream(response)
+            self._adapt_batch_size(time.monotonic() - started)
+            documents = orjson.loads(content)["documents"]
+        except APIConnectionError as e:
+            # A dropped pool keeps failing; start over with fresh connections
+            self._recycle_connections()
+            raise Exception(f"OpenAI API error: {str(e)}")
+        except APIError as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+        except (json.JSONDecodeError, KeyError, TypeError):
+            documents = None
+        
+        if not isinstance(documents, list) or len(documents) != len(group):
+            # The reply cannot be aligned with its inputs; extract each document on its own
+            return [self.extract_structured_data(text) for _, text in group]
+        
+        if self.cache is not None:
+            for (_, text), result in zip(group, documents):
+                self.cache.set(self._request_key(self._build_messages(text)), result)
+        return documents
+    
+    def _group_size(self) -> int:
+        """Documents in the next batch request: K, limited so their responses fit the output limit"""
+        fits = Config.OPENAI_MAX_OUTPUT_TOKENS // max(1, Config.OPENAI_BATCH_DOC_MAX_TOKENS)
+        return max(1, min(self.batch_size, fits))
+    
+    def _adapt_batch_size(self, elapsed: float) -> None:
+        """Halve K when a batch request runs past the latency target, otherwise grow it by one"""
+        if elapsed > Config.OPENAI_BATCH_TARGET_SECONDS:
+            self.batch_size = max(1, self.batch_size // 2)
+        elif self.batch_size < Config.OPENAI_BATCH_MAX_SIZE:
+            self.batch_size += 1
+    
+    def _build_messages(self, text: str) -> List[Dict[str, str]]:
+        """Chat messages for a single prepared document"""
+        # Stable prefix first, document last, so OpenAI's automatic prompt
+        # caching can reuse the instruction tokens across documents
+        return [
+            _SYSTEM_MESSAGE,
+            {"role": "user", "content": USER_PROMPT_PREFIX + text}
+        ]
+    
+    def _read_stream(self, stream) -> str:
+        """Collect the content deltas of a streamed completion into the full reply"""
+        # Join once at the end; += on the growing reply would be quadratic
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+        return "".join(parts)
+    
+    async def _read_stream_async(self, stream) -> str:
+        """Collect the content deltas of a streamed async completion into the full reply"""
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+        return "".join(parts)
+    
+    def _request_key(self, messages: List[Dict[str, str]]) -> str:
+        """Response cache key for a single-document request"""
+        return ResponseCache.make_key(self._request_key_prefix, messages[-1]["content"])
+    
+    def _lookup_cached(self, text: str, messages: List[Dict[str, str]]) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[list]]:
+        """Return (cached result, exact cache key, document embedding) for a prepared request"""
+        # Identical requests (same document, prompts, model and schema) reuse the stored response
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._request_key(messages)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached, cache_key, None
+        
+        # Near-duplicate documents (same deal, different formatting) reuse a similar response
+        embedding = None
+        if self.semantic_cache is not None:
+            embedding = self._embed(text[:SEMANTIC_CACHE_CHARS])
+            if embedding is not None:
+                cached = self.semantic_cache.lookup(self._semantic_namespace, embedding)
+                if cached is not None:
+                    return cached, cache_key, embedding
+        return None, cache_key, embedding
+    
+    def _store_cached(self, cache_key: Optional[str], embedding: Optional[list], result: Dict[str, Any]) -> None:
+        """Record a fresh API result in whichever caches were consulted for it"""
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        if embedding is not None:
+            self.semantic_cache.add(self._semantic_namespace, embedding, result)
+    
+    def _get_async_client(self) -> Tuple[AsyncOpenAI, TokenBucketRateLimiter]:
+        """AsyncOpenAI client and rate limiter for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_state is None or self._async_state[0] is not loop:
+            self._async_state = (
+                loop,
+                AsyncOpenAI(
+                    api_key=Config.OPENAI_API_KEY,
+                    timeout=HTTP_TIMEOUT_SECONDS,
+                    http_client=httpx.AsyncClient(**_http_options()) if httpx is not None else None
+                ),
+                TokenBucketRateLimiter(Config.OPENAI_RPM_LIMIT, Config.OPENAI_TPM_LIMIT)
+            )
+        return self._async_state[1], self._async_state[2]
+    
+    def _recycle_connections(self) -> None:
+        """Drop the shared clients so the next request opens new connections"""
+        _get_client.cache_clear()
+        self.client = _get_client(Config.OPENAI_API_KEY)
+        self._async_state = None
+    
+    def _estimate_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """Tokens a request counts against the TPM limit: the prompt plus max_tokens"""
+        encoding = _get_encoding(self.model)
+        if encoding is None:
+            prompt_tokens = sum(len(message["content"]) for message in messages) // CHARS_PER_TOKEN
+        else:
+            prompt_tokens = sum(len(encoding.encode(message["content"], disallowed_special=())) for message in messages)
+        return prompt_tokens + self.max_tokens
+    
+    def _embed(self, text: str) -> Optional[list]:
+        """Embed text for semantic cache lookups; None if the embedding call fails"""
+        key = ResponseCache.make_key('embedding', Config.OPENAI_EMBEDDING_MODEL, text)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        try:
+            embedding = self.client.embeddings.create(model=Config.OPENAI_EMBEDDING_MODEL, input=text).data[0].embedding
+        except APIError:
+            # The semantic cache is an optimization; extraction proceeds without it
+            return None
+        if self.cache is not None:
+            self.cache.set(key, embedding)
+        return embedding
+    
+    def _prepare_text(self, text: str) -> str:
+        """
+        Prepare text for OpenAI API by trimming it to the input token budget.
+        Long documents keep their pages/sheets with the most CRE figures, in document order.
+        """
+        budget = max(MIN_DOCUMENT_TOKENS, Config.OPENAI_CONTEXT_TOKENS - self.max_tokens - PROMPT_OVERHEAD_TOKENS)
+        if self._count_tokens(text) <= budget:
+            return text
+        
+        for boundary in (_BLOCK_BOUNDARY, _PARAGRAPH_BOUNDARY, _LINE_BOUNDARY):
+            blocks = [block for block in boundary.split(text) if block.strip()]
+            if len(blocks) > 1:
+                break
+        block_tokens = [self._count_tokens(block) for block in blocks]
+        scores = [len(_CRE_TERMS.findall(block)) for block in blocks]
+        
+        # Highest-scoring blocks first (earlier ones win ties), packed while they fit
+        selected = []
+        used = 0
+        for index in sorted(range(len(blocks)), key=lambda i: (-scores[i], i)):
+            if used + block_tokens[index] <= budget:
+                selected.append(index)
+                used += block_tokens[index]
+        if not selected:
+            # Every block is larger than the budget; keep the beginning and end, which
+            # often hold the summaries
+            head = self._truncate_tokens(text, budget // 2)
+            tail = self._truncate_tokens(text, budget - budget // 2, from_end=True)
+            return head + TRUNCATION_MARKER + tail
+        
+        parts = []
+        previous = -1
+        for index in sorted(selected):
+            if index != previous + 1:
+                parts.append(TRUNCATION_MARKER)
+            parts.append(blocks[index])
+            previous = index
+        if previous != len(blocks) - 1:
+            parts.append(TRUNCATION_MARKER)
+        return "".join(parts)
+    
+    def _count_tokens(self, text: str) -> int:
+        """Token count of text for the configured model"""
+        encoding = _get_encoding(self.model)
+        if encoding is None:
+            return len(text) // CHARS_PER_TOKEN
+        return len(encoding.encode(text, disallowed_special=()))
+    
+    def _truncate_tokens(self, text: str, max_tokens: int, from_end: bool = False) -> str:
+        """Leading (or, from_end, trailing) max_tokens tokens of text"""
+        if max_tokens <= 0:
+            return ""
+        encoding = _get_encoding(self.model)
+        if encoding is None:
+            chars = max_tokens * CHARS_PER_TOKEN
+            return text[-chars:] if from_end else text[:chars]
+        tokens = encoding.encode(text, disallowed_special=())
+        return encoding.decode(tokens[-max_tokens:] if from_end else tokens[:max_tokens])
     
     def _get_empty_response(self) -> Dict[str, Any]:
         """Return empty response with correct structure including citations"""
-        return {
-            "property_details": {
-                "property_address": {"value": None, "unit": None, "source_text": None},
-                "property_type": {"value": None, "unit": None, "source_text": None},
-                "square_footage": {"value": None, "unit": None, "source_text": None},
-                "acres": {"value": None, "unit": None, "source_text": None},
-                "land_square_feet": {"value": None, "unit": None, "source_text": None},
-                "gross_building_area": {"value": None, "unit": None, "source_text": None},
-                "net_rentable_area": {"value": None, "unit": None, "source_text": None},
-                "year_built": {"value": None, "unit": None, "source_text": None},
-                "units": {"value": None, "unit": None, "source_text": None},
-                "occupancy_rate": {"value": None, "unit": None, "source_text": None}
-            },
-            "financial_metrics": {
-                "noi_annual": {"value": None, "unit": None, "source_text": None},
-                "stabilized_noi": {"value": None, "unit": None, "source_text": None},
-                "cap_rate": {"value": None, "unit": None, "source_text": None},
-                "purchase_price": {"value": None, "unit": None, "source_text": None},
-                "appraised_value": {"value": None, "unit": None, "source_text": None},
-                "annual_gross_income": {"value": None, "unit": None, "source_text": None},
-                "operating_expenses": {"value": None, "unit": None, "source_text": None},
-                "debt_service": {"value": None, "unit": None, "source_text": None},
-                "dscr": {"value": None, "unit": None, "source_text": None},
-                "irr": {"value": None, "unit": None, "source_text": None},
-                "project_cost": {"value": None, "unit": None, "source_text": None},
-                "expected_exit_valuation": {"value": None, "unit": None, "source_text": None},
-                "expected_rents": []
-            },
-            "loan_details": {
-                "loan_amount": {"value": None, "unit": None, "source_text": None},
-                "interest_rate": {"value": None, "unit": None, "source_text": None},
-                "loan_term_years": {"value": None, "unit": None, "source_text": None},
-                "loan_type": {"value": None, "unit": None, "source_text": None},
-                "lender": {"value": None, "unit": None, "source_text": None},
-                "maturity_date": {"value": None, "unit": None, "source_text": None},
-                "ltv": {"value": None, "unit": None, "source_text": None}
-            },
-            "tenant_information": {
-                "major_tenants": [],
-                "lease_terms": {"value": None, "unit": None, "source_text": None},
-                "tenant_quality": {"value": None, "unit": None, "source_text": None}
-            },
-            "market_analysis": {
-                "market": {"value": None, "unit": None, "source_text": None},
-                "submarket": {"value": None, "unit": None, "source_text": None},
-                "comparable_properties": [],
-                "market_trends": []
-            },
-            "risk_assessment": {
-                "identified_risks": [],
-                "mitigation_strategies": []
-            },
-            "extraction_metadata": {
-                "confidence_score": 0.0,
-                "missing_fields": [],
-                "fields_with_citations": 0,
-                "fields_without_citations": 0,
-                "citation_coverage_percent": 0.0
-            }
-        }
+        # A fresh decode each time, since callers fill in extraction_metadata
+        return orjson.loads(_EMPTY_RESPONSE_JSON)
     
     def extract_with_confidence(self, text: str) -> Dict[str, Any]:
         """
@@ -159,96 +656,50 @@ Remember: EVERY non-null value must have a corresponding source_text snippet fro
         
         # Calculate confidence score and citation statistics
         total_fields = self._count_total_fields()
-        filled_fields = self._count_filled_fields(result)
-        fields_with_citations = self._count_fields_with_citations(result)
+        filled_fields, fields_with_citations, missing_fields = self._compute_metadata(result)
         
         confidence = (filled_fields / total_fields * 100) if total_fields > 0 else 0
         citation_coverage = (fields_with_citations / filled_fields * 100) if filled_fields > 0 else 0
         
-        result['extraction_metadata']['confidence_score'] = round(confidence, 2)
-        result['extraction_metadata']['missing_fields'] = self._identify_missing_fields(result)
-        result['extraction_metadata']['fields_with_citations'] = fields_with_citations
-        result['extraction_metadata']['fields_without_citations'] = filled_fields - fields_with_citations
-        result['extraction_metadata']['citation_coverage_percent'] = round(citation_coverage, 2)
+        metadata = result['extraction_metadata']
+        metadata['confidence_score'] = round(confidence, 2)
+        metadata['missing_fields'] = missing_fields
+        metadata['fields_with_citations'] = fields_with_citations
+        metadata['fields_without_citations'] = filled_fields - fields_with_citations
+        metadata['citation_coverage_percent'] = round(citation_coverage, 2)
         
         return result
     
     def _count_total_fields(self) -> int:
         """Count total extractable fields"""
-        return 38  # Based on schema
+        return len(_SCALAR_PATHS) + len(_LIST_PATHS)
     
-    def _count_filled_fields(self, data: Dict[str, Any]) -> int:
-        """Count non-null fields in extracted data"""
-        count = 0
-        
-        def count_fields(obj):
-            nonlocal count
-            if isinstance(obj, dict):
-                for key, value in obj.items():
-                    if key in ('source_text', 'unit'):
-                        continue
-                    if value is None:
-                        continue
-                    elif isinstance(value, dict):
-                        # Check if this is a value/citation pair
-                        if 'value' in value:
-                            if value['value'] is not None:
-                                count += 1
-                        else:
-                            count_fields(value)
-                    elif isinstance(value, list):
-                        for item in value:
-                            if item:
-                                count += 1
-                    else:
-                        count += 1
-            elif isinstance(obj, list):
-                for item in obj:
-                    if item:
-                        count += 1
-        
-        count_fields(data)
-        return count
-    
-    def _count_fields_with_citations(self, data: Dict[str, Any]) -> int:
-        """Count fields that have both value and citation"""
-        count = 0
-        
-        def count_citations(obj):
-            nonlocal count
-            if isinstance(obj, dict):
-                for key, value in obj.items():
-                    if isinstance(value, dict):
-                        if 'value' in value and 'source_text' in value:
-                            if value['value'] is not None and value['source_text'] is not None:
-                                count += 1
-                        else:
-                            count_citations(value)
-                    elif isinstance(value, list):
-                        for item in value:
-                            if isinstance(item, dict) and 'source_text' in item:
-                                if item.get('source_text') is not None and any(v for k, v in item.items() if k not in ('source_text', 'unit') and v is not None):
-                                    count += 1
-        
-        count_citations(data)
-        return count
-    
-    def _identify_missing_fields(self, data: Dict[str, Any]) -> list:
-        """Identify which fields are empty"""
+    def _compute_metadata(self, data: Dict[str, Any]) -> Tuple[int, int, List[str]]:
+        """Count filled and cited fields and list the missing ones, in one walk"""
+        filled = 0
+        with_citations = 0
         missing = []
-        
-        def check_fields(obj, prefix=""):
-            for key, value in obj.items():
-                field_path = f"{prefix}.{key}" if prefix else key
-                if isinstance(value, dict):
-                    if key in ("source_text", "unit"):
-                        continue
-                    check_fields(value, field_path)
-                elif isinstance(value, list):
-                    if not value:
-                        missing.append(field_path)
-                elif value is None:
-                    missing.append(field_path)
-        
-        check_fields(data)
-        return missing
+        for path, name in _SCALAR_FIELDS:
+            node = _lookup_path(data, path)
+            if isinstance(node, dict) and node.get('value') is not None:
+                filled += 1
+                if node.get('source_text') is not None:
+                    with_citations += 1
+            else:
+                missing.append(name)
+        for path, name in _LIST_FIELDS:
+            items = _lookup_path(data, path)
+            if not items:
+                missing.append(name)
+                continue
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                if not item:
+                    continue
+                filled += 1
+                if isinstance(item, dict) and item.get('source_text') is not None and any(
+                    v is not None for k, v in item.items() if k not in ('source_text', 'unit')
+                ):
+                    with_citations += 1
+        return filled, with_citations, missing
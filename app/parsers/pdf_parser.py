@@ -1,50 +1,189 @@
+import asyncio
+import multiprocessing
 import pdfplumber
-from typing import Dict, Any, List
-from app.parsers.base_parser import BaseParser
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from app.parsers._pool import MAX_POOL_WORKERS, POOL
+from app.parsers.base_parser import BaseParser, Source, open_source
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    # Optional: without pypdfium2, page text is read with pdfplumber as well
+    pdfium = None
+
+# pdfplumber layout analysis is CPU-bound, so long documents are split across
+# processes; below this page count the worker start-up costs more than it saves.
+MIN_PAGES_FOR_PARALLEL = 8
+MAX_PAGE_WORKERS = MAX_POOL_WORKERS
+
+
+def _page_ranges(page_count: int, workers: int) -> List[Tuple[int, int]]:
+    """Split pages into contiguous [start, stop) ranges, one per worker"""
+    size, extra = divmod(page_count, workers)
+    ranges = []
+    start = 0
+    for worker in range(workers):
+        stop = start + size + (1 if worker < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _iter_pdfium_page_texts(file_path: Source) -> Iterator[str]:
+    """Raw text of each page via PDFium, an order of magnitude faster than pdfminer"""
+    # PDFium opens paths and bytes alike
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        for page in pdf:
+            text_page = page.get_textpage()
+            # PDFium ends lines with CRLF and marks soft hyphens with U+FFFE
+            text = text_page.get_text_range().replace('\r\n', '\n').replace('\ufffe', '')
+            text_page.close()
+            page.close()
+            yield text
+    finally:
+        pdf.close()
+
+
+def _iter_pdfplumber_page_texts(file_path: Source) -> Iterator[str]:
+    """Text of each page via pdfplumber, read one page at a time"""
+    with pdfplumber.open(open_source(file_path)) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+
+
+def _read_pages(pdf, start: int, stop: int, with_text: bool, with_tables: bool) -> Tuple[List[str], List[Dict]]:
+    """Text and/or tables of pages [start, stop) in one pass over the pages"""
+    page_texts = []
+    tables = []
+    for index in range(start, stop):
+        page = pdf.pages[index]
+        if with_text:
+            page_texts.append(page.extract_text() or "")
+        if with_tables:
+            # Same page object, so the parsed layout objects are reused rather than rebuilt
+            for table in page.extract_tables() or []:
+                tables.append({
+                    'page': index + 1,
+                    'data': table
+                })
+    return page_texts, tables
+
+
+def _read_page_range(job: Tuple[Source, int, int, bool, bool]) -> Tuple[List[str], List[Dict]]:
+    """_read_pages for a page range of a PDF, run in a worker process"""
+    file_path, start, stop, with_text, with_tables = job
+    # Each worker opens the file once for its whole range; pdfplumber loads pages lazily
+    with pdfplumber.open(open_source(file_path)) as pdf:
+        return _read_pages(pdf, start, stop, with_text, with_tables)
+
+
+def _parse_pdf_worker(file_path: Source) -> Tuple[Dict[str, Any], str]:
+    """Parse a PDF in a pool worker; returns (extracted data, text)"""
+    parser = PDFParser(file_path)
+    return parser.parse(), parser.extract_text()
+
 
 class PDFParser(BaseParser):
     """Parser for PDF documents"""
     
+    def __init__(self, file_path: Source):
+        super().__init__(file_path)
+        self._text_cache = None
+    
     def parse(self) -> Dict[str, Any]:
         """Parse PDF and extract structured data"""
         try:
-            with pdfplumber.open(self.file_path) as pdf:
+            with pdfplumber.open(open_source(self.file_path)) as pdf:
+                # pdfplumber earns its keep on table detection; raw text comes from PDFium when available
+                page_texts, tables = self._read_all_pages(pdf, with_text=pdfium is None, with_tables=True)
+                if pdfium is not None:
+                    page_texts = list(_iter_pdfium_page_texts(self.file_path))
+                self._text_cache = self._join_pages(page_texts)
                 self.extracted_data = {
                     'file_type': 'PDF',
                     'pages': len(pdf.pages),
-                    'text': self._extract_all_text(pdf),
-                    'tables': self._extract_tables(pdf),
+                    'text': self._text_cache,
+                    'tables': tables,
                     'metadata': pdf.metadata or {}
                 }
             return self.extracted_data
         except Exception as e:
             raise Exception(f"Error parsing PDF: {str(e)}")
     
-    def extract_text(self) -> str:
-        """Extract all text from PDF"""
+    async def parse_async(self) -> Dict[str, Any]:
+        """Parse in the shared process pool so the calling event loop stays free"""
+        loop = asyncio.get_running_loop()
+        try:
+            self.extracted_data, self._text_cache = await loop.run_in_executor(POOL, _parse_pdf_worker, self.file_path)
+            return self.extracted_data
+        except Exception as e:
+            raise Exception(f"Error parsing PDF: {str(e)}")
+    
+    def extract_text(self, limit: Optional[int] = None) -> str:
+        """Extract all text from PDF, or only its first limit characters"""
+        if self._text_cache is not None:
+            return self._text_cache if limit is None else self._text_cache[:limit]
         try:
-            with pdfplumber.open(self.file_path) as pdf:
-                return self._extract_all_text(pdf)
+            if limit is not None:
+                return self._extract_text_prefix(limit)
+            # Text only; table detection is skipped when nothing has been parsed yet
+            if pdfium is not None:
+                page_texts = list(_iter_pdfium_page_texts(self.file_path))
+            else:
+                with pdfplumber.open(open_source(self.file_path)) as pdf:
+                    page_texts, _ = self._read_all_pages(pdf, with_text=True, with_tables=False)
+            self._text_cache = self._join_pages(page_texts)
+            return self._text_cache
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
     
-    def _extract_all_text(self, pdf) -> str:
-        """Extract text from all pages"""
-        text = ""
-        for page_num, page in enumerate(pdf.pages, 1):
-            text += f"\n--- PAGE {page_num} ---\n"
-            text += page.extract_text() or ""
-        return text
+    def _extract_text_prefix(self, limit: int) -> str:
+        """First limit characters of the text, reading pages only until they are covered"""
+        page_texts = _iter_pdfium_page_texts(self.file_path) if pdfium is not None else _iter_pdfplumber_page_texts(self.file_path)
+        parts = []
+        length = 0
+        try:
+            for page_num, page_text in enumerate(page_texts, 1):
+                marker = f"\n--- PAGE {page_num} ---\n"
+                parts.append(marker)
+                parts.append(page_text)
+                length += len(marker) + len(page_text)
+                if length >= limit:
+                    break
+        finally:
+            # Close the document now rather than when the generator is collected
+            page_texts.close()
+        return "".join(parts)[:limit]
     
-    def _extract_tables(self, pdf) -> List[List[Dict]]:
-        """Extract tables from PDF"""
+    def _read_all_pages(self, pdf, with_text: bool, with_tables: bool) -> Tuple[List[str], List[Dict]]:
+        """Page texts and/or tables of the whole document, across processes for long ones"""
+        page_count = len(pdf.pages)
+        workers = self._parallel_workers(page_count)
+        if workers == 1:
+            return _read_pages(pdf, 0, page_count, with_text, with_tables)
+        
+        jobs = [(self.file_path, start, stop, with_text, with_tables) for start, stop in _page_ranges(page_count, workers)]
+        page_texts = []
         tables = []
-        for page_num, page in enumerate(pdf.pages, 1):
-            page_tables = page.extract_tables()
-            if page_tables:
-                for table in page_tables:
-                    tables.append({
-                        'page': page_num,
-                        'data': table
-                    })
-        return tables
+        for range_texts, range_tables in POOL.map(_read_page_range, jobs):
+            page_texts.extend(range_texts)
+            tables.extend(range_tables)
+        return page_texts, tables
+    
+    def _join_pages(self, page_texts: List[str]) -> str:
+        """Join page texts under '--- PAGE n ---' markers"""
+        parts = []
+        for page_num, page_text in enumerate(page_texts, 1):
+            parts.append(f"\n--- PAGE {page_num} ---\n")
+            parts.append(page_text)
+        return "".join(parts)
+    
+    def _parallel_workers(self, page_count: int) -> int:
+        """Number of processes to read pages with; 1 means read them in this process"""
+        if page_count < MIN_PAGES_FOR_PARALLEL:
+            return 1
+        if multiprocessing.parent_process() is not None:
+            # Already a worker (e.g. DataExtractor.extract_batch); don't nest pools
+            return 1
+        return min(MAX_PAGE_WORKERS, page_count)
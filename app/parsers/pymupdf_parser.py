@@ -0,0 +1,107 @@
+import re
+from typing import Dict, Any, List, Optional
+from app.parsers.base_parser import BaseParser, Source
+from app.parsers.pdf_parser import PDFParser
+
+try:
+    import fitz
+except ImportError:
+    # Optional: without PyMuPDF, PDFs are read with pdfplumber only
+    fitz = None
+
+# Below these, PyMuPDF text is treated as degenerate (scanned pages, broken
+# font encodings) and the document is re-read with pdfplumber.
+MIN_CHARS_PER_PAGE = 20
+MIN_PRINTABLE_RATIO = 0.95
+MIN_AVG_LINE_LENGTH = 3.0
+
+# Control characters and U+FFFD, which PyMuPDF emits for unmappable glyphs
+_UNPRINTABLE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\x7f\ufffd]')
+
+def _open_document(source: Source):
+    """Open a PDF from its path or from its bytes"""
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype='pdf')
+    return fitz.open(source)
+
+class PyMuPDFParser(BaseParser):
+    """Parser for PDF documents using PyMuPDF, falling back to pdfplumber on poor text"""
+    
+    def __init__(self, file_path: Source):
+        super().__init__(file_path)
+        self._text_cache = None
+        self._fallback: Optional[PDFParser] = None
+    
+    def parse(self) -> Dict[str, Any]:
+        """Parse PDF and extract structured data"""
+        try:
+            with _open_document(self.file_path) as doc:
+                page_texts = [page.get_text() for page in doc]
+                if not self._text_quality_ok(page_texts):
+                    return self._parse_with_fallback()
+                self.extracted_data = {
+                    'file_type': 'PDF',
+                    'pages': len(page_texts),
+                    'text': self._join_pages(page_texts),
+                    'tables': self._extract_tables(doc),
+                    'metadata': doc.metadata or {}
+                }
+            self._text_cache = self.extracted_data['text']
+            return self.extracted_data
+        except Exception as e:
+            raise Exception(f"Error parsing PDF: {str(e)}")
+    
+    def extract_text(self) -> str:
+        """Extract all text from PDF"""
+        if self._fallback is not None:
+            return self._fallback.extract_text()
+        if self._text_cache is not None:
+            return self._text_cache
+        try:
+            with _open_document(self.file_path) as doc:
+                page_texts = [page.get_text() for page in doc]
+            if not self._text_quality_ok(page_texts):
+                self._fallback = PDFParser(self.file_path)
+                return self._fallback.extract_text()
+            self._text_cache = self._join_pages(page_texts)
+            return self._text_cache
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF: {str(e)}")
+    
+    def _parse_with_fallback(self) -> Dict[str, Any]:
+        """Parse with pdfplumber and route later text requests to it"""
+        self._fallback = PDFParser(self.file_path)
+        self.extracted_data = self._fallback.parse()
+        return self.extracted_data
+    
+    def _join_pages(self, page_texts: List[str]) -> str:
+        """Join page texts with the same page markers PDFParser uses"""
+        parts = []
+        for page_num, page_text in enumerate(page_texts, 1):
+            parts.append(f"\n--- PAGE {page_num} ---\n")
+            parts.append(page_text)
+        return "".join(parts)
+    
+    def _text_quality_ok(self, page_texts: List[str]) -> bool:
+        """Cheap check that the extracted text is real text rather than noise"""
+        text = "".join(page_texts)
+        content_length = len(text.strip())
+        if content_length < MIN_CHARS_PER_PAGE * max(len(page_texts), 1):
+            return False
+        if 1 - len(_UNPRINTABLE.findall(text)) / len(text) < MIN_PRINTABLE_RATIO:
+            return False
+        return content_length / (text.count('\n') + 1) >= MIN_AVG_LINE_LENGTH
+    
+    def _extract_tables(self, doc) -> List[Dict]:
+        """Extract tables from PDF"""
+        tables = []
+        for page_num, page in enumerate(doc, 1):
+            # Table detection needs PyMuPDF 1.23+
+            if not hasattr(page, 'find_tables'):
+                break
+            for table in page.find_tables().tables:
+                tables.append({
+                    'page': page_num,
+                    'data': table.extract()
+                })
+        return tables
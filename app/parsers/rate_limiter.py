@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+# OpenAI enforces its RPM/TPM limits per minute
+SECONDS_PER_MINUTE = 60.0
+
+class TokenBucketRateLimiter:
+    """Waits until both the request and token budgets cover a request, then spends them"""
+    
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # Both buckets start full and refill continuously up to one minute's worth
+        self.available_request_capacity = float(requests_per_minute)
+        self.available_token_capacity = float(tokens_per_minute)
+        self._last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, tokens: int) -> None:
+        """Block until a request costing tokens is within capacity, then deduct it"""
+        # A single request larger than the whole budget would otherwise wait forever
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                self._refill()
+                request_deficit = 1 - self.available_request_capacity
+                token_deficit = tokens - self.available_token_capacity
+                if request_deficit <= 0 and token_deficit <= 0:
+                    self.available_request_capacity -= 1
+                    self.available_token_capacity -= tokens
+                    return
+                # Sleep just long enough for the scarcer bucket to cover the request
+                await asyncio.sleep(max(
+                    request_deficit * SECONDS_PER_MINUTE / self.requests_per_minute,
+                    token_deficit * SECONDS_PER_MINUTE / self.tokens_per_minute
+                ))
+    
+    def _refill(self) -> None:
+        """Add the capacity earned since the last update"""
+        now = time.monotonic()
+        minutes = (now - self._last_update) / SECONDS_PER_MINUTE
+        self._last_update = now
+        self.available_request_capacity = min(
+            self.requests_per_minute, self.available_request_capacity + self.requests_per_minute * minutes
+        )
+        self.available_token_capacity = min(
+            self.tokens_per_minute, self.available_token_capacity + self.tokens_per_minute * minutes
+        )
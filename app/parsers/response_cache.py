@@ -0,0 +1,166 @@
+import hashlib
+import orjson
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+class ResponseCache:
+    """Small SQLite-backed key/value store for extraction responses with a TTL"""
+    
+    def __init__(self, path: str, ttl_seconds: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+    
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Hash the request components into a stable cache key"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode('utf-8'))
+            # Separator so ("ab", "c") and ("a", "bc") hash differently
+            digest.update(b'\x00')
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if absent, expired or unreadable"""
+        try:
+            row = self._execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+            )
+        except sqlite3.Error:
+            # A broken cache only costs a miss, never the extraction itself
+            return None
+        return orjson.loads(row[0]) if row else None
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key for ttl_seconds (best effort)"""
+        try:
+            self._execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, orjson.dumps(value).decode(), time.time() + self.ttl_seconds)
+            )
+        except sqlite3.Error:
+            pass
+    
+    def _execute(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        """Run one statement in its own transaction and return the first row"""
+        return _execute(self.path, sql, params)
+
+
+def _execute(path: str, sql: str, params: tuple = ()) -> Optional[tuple]:
+    """Run one statement in its own transaction and return the first row"""
+    # A connection per call keeps the caches safe to share across request threads
+    conn = sqlite3.connect(path, timeout=5)
+    try:
+        with conn:
+            return conn.execute(sql, params).fetchone()
+    finally:
+        conn.close()
+
+
+class SemanticCache:
+    """Nearest-neighbour response cache over document embeddings, stored in SQLite"""
+    
+    def __init__(self, path: str, ttl_seconds: int, similarity_threshold: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        # namespace -> (unit embedding matrix, expiry times, stored JSON values)
+        self._index: Dict[str, Tuple[np.ndarray, np.ndarray, List[str]]] = {}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _execute(
+            path,
+            "CREATE TABLE IF NOT EXISTS semantic_responses ("
+            "namespace TEXT NOT NULL, embedding BLOB NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+    
+    def lookup(self, namespace: str, embedding: List[float]) -> Optional[Any]:
+        """Return the stored value of the most similar live entry above the threshold"""
+        query = _unit_vector(embedding)
+        with self._lock:
+            matrix, expires_at, values = self._load(namespace)
+            best = None
+            if len(values):
+                scores = matrix @ query
+                scores[expires_at <= time.time()] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] < self.similarity_threshold:
+                    best = None
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return orjson.loads(values[best])
+    
+    def add(self, namespace: str, embedding: List[float], value: Any) -> None:
+        """Store value under this embedding for ttl_seconds (best effort)"""
+        vector = _unit_vector(embedding)
+        expires_at = time.time() + self.ttl_seconds
+        encoded = orjson.dumps(value).decode()
+        try:
+            _execute(
+                self.path,
+                "INSERT INTO semantic_responses (namespace, embedding, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, vector.tobytes(), encoded, expires_at)
+            )
+        except sqlite3.Error:
+            return
+        with self._lock:
+            matrix, expiries, values = self._load(namespace)
+            self._index[namespace] = (
+                np.vstack([matrix, vector]) if len(values) else vector[np.newaxis, :],
+                np.append(expiries, expires_at),
+                values + [encoded]
+            )
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for tuning the similarity threshold"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'similarity_threshold': self.similarity_threshold
+        }
+    
+    def _load(self, namespace: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Return the in-memory index for a namespace, reading SQLite on first use"""
+        if namespace not in self._index:
+            conn = sqlite3.connect(self.path, timeout=5)
+            try:
+                rows = conn.execute(
+                    "SELECT embedding, value, expires_at FROM semantic_responses WHERE namespace = ? AND expires_at > ?",
+                    (namespace, time.time())
+                ).fetchall()
+            except sqlite3.Error:
+                rows = []
+            finally:
+                conn.close()
+            if rows:
+                matrix = np.vstack([np.frombuffer(row[0], dtype=np.float32) for row in rows])
+            else:
+                matrix = np.empty((0, 0), dtype=np.float32)
+            self._index[namespace] = (matrix, np.array([row[2] for row in rows]), [row[1] for row in rows])
+        return self._index[namespace]
+
+
+def _unit_vector(embedding: List[float]) -> np.ndarray:
+    """Embedding as a float32 vector of length 1, so a dot product is the cosine"""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
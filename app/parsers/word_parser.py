@@ -1,19 +1,83 @@
+import zipfile
 from docx import Document
-from typing import Dict, Any, List
-from app.parsers.base_parser import BaseParser
+from lxml import etree
+from typing import Dict, Any, List, Tuple
+from app.parsers.base_parser import BaseParser, Source, open_source
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY, _W_P, _W_PPR, _W_R, _W_SECTPR = _W + 'body', _W + 'p', _W + 'pPr', _W + 'r', _W + 'sectPr'
+_W_T, _W_TAB, _W_BR, _W_CR = _W + 't', _W + 'tab', _W + 'br', _W + 'cr'
+_OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+# Same hardening python-docx applies: never resolve entities from the document
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+
+def _read_docx_text(file_path: Source) -> Tuple[str, int]:
+    """Body text and section count of a .docx, read straight from its XML part"""
+    with zipfile.ZipFile(open_source(file_path)) as package:
+        part_name = 'word/document.xml'
+        rels = etree.fromstring(package.read('_rels/.rels'), _XML_PARSER)
+        for rel in rels:
+            if rel.get('Type') == _OFFICE_DOCUMENT_REL:
+                part_name = rel.get('Target').lstrip('/')
+                break
+        root = etree.fromstring(package.read(part_name), _XML_PARSER)
+    
+    # Mirrors python-docx: top-level body paragraphs, their direct runs, and
+    # w:t/w:tab/w:br/w:cr inside each run, one line per paragraph
+    body = root.find(_W_BODY)
+    parts = []
+    sections = 0
+    for para in body.iterchildren(_W_P):
+        for run in para.iterchildren(_W_R):
+            for child in run:
+                tag = child.tag
+                if tag == _W_T:
+                    parts.append(child.text or "")
+                elif tag == _W_TAB:
+                    parts.append("\t")
+                elif tag == _W_BR or tag == _W_CR:
+                    parts.append("\n")
+        parts.append("\n")
+        properties = para.find(_W_PPR)
+        if properties is not None and properties.find(_W_SECTPR) is not None:
+            sections += 1
+    if body.find(_W_SECTPR) is not None:
+        sections += 1
+    return "".join(parts), sections
+
 
 class WordParser(BaseParser):
     """Parser for Word (.docx) documents"""
     
+    def __init__(self, file_path: Source):
+        super().__init__(file_path)
+        self._text_cache = None
+        # Set when only the text view is consumed; parse then skips the python-docx model
+        self._text_only = False
+    
     def parse(self) -> Dict[str, Any]:
         """Parse Word document and extract structured data"""
         try:
-            doc = Document(self.file_path)
+            if self._text_only:
+                # Paragraph and table details are only needed for raw_data
+                self._text_cache, sections = _read_docx_text(self.file_path)
+                self.extracted_data = {
+                    'file_type': 'Word',
+                    'paragraphs': [],
+                    'tables': [],
+                    'text': self._text_cache,
+                    'sections': sections
+                }
+                return self.extracted_data
+            doc = Document(open_source(self.file_path))
+            # One walk over the paragraphs fills both the paragraph list and the text view
+            paragraphs, self._text_cache = self._read_paragraphs(doc)
             self.extracted_data = {
                 'file_type': 'Word',
-                'paragraphs': self._extract_paragraphs(doc),
+                'paragraphs': paragraphs,
                 'tables': self._extract_tables(doc),
-                'text': self.extract_text(),
+                'text': self._text_cache,
                 'sections': len(doc.sections)
             }
             return self.extracted_data
@@ -22,26 +86,31 @@ class WordParser(BaseParser):
     
     def extract_text(self) -> str:
         """Extract all text from Word document"""
+        if self._text_cache is not None:
+            return self._text_cache
         try:
-            doc = Document(self.file_path)
-            text = ""
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-            return text
+            # Text alone does not need python-docx's object model; scan the XML directly
+            self._text_cache, _ = _read_docx_text(self.file_path)
+            return self._text_cache
         except Exception as e:
             raise Exception(f"Error extracting text from Word document: {str(e)}")
     
-    def _extract_paragraphs(self, doc) -> List[Dict[str, Any]]:
-        """Extract paragraphs with formatting info"""
+    def _read_paragraphs(self, doc) -> Tuple[List[Dict[str, Any]], str]:
+        """Extract non-empty paragraphs with formatting info, plus the full text"""
         paragraphs = []
+        text_parts = []
         for para in doc.paragraphs:
-            if para.text.strip():
+            # para.text re-joins the runs on every access, so read it once
+            text = para.text
+            text_parts.append(text + "\n")
+            if text.strip():
                 paragraphs.append({
-                    'text': para.text,
+                    'text': text,
                     'style': para.style.name,
-                    'level': para.paragraph_format.outline_level
+                    # python-docx has no outline_level accessor; None unless a later release adds one
+                    'level': getattr(para.paragraph_format, 'outline_level', None)
                 })
-        return paragraphs
+        return paragraphs, "".join(text_parts)
     
     def _extract_tables(self, doc) -> List[List[List[str]]]:
         """Extract tables from Word document"""
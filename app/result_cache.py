@@ -0,0 +1,38 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import orjson
+
+class ResultCache:
+    """Thread-safe in-process LRU of extraction results"""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        # Results are stored encoded so every hit hands out a fresh copy the route can modify
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result for key, or None"""
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is None:
+                return None
+            self._entries.move_to_end(key)
+        return orjson.loads(encoded)
+    
+    def set(self, key: Hashable, result: Dict[str, Any]) -> None:
+        """Store result under key, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        try:
+            # default=str matches what the JSON response makes of e.g. Decimal values
+            encoded = orjson.dumps(result, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            # Caching is best effort; an unencodable result is simply not kept
+            return
+        with self._lock:
+            self._entries[key] = encoded
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
@@ -1,27 +1,89 @@
-from flask import Blueprint, render_template, request, jsonify, send_file
+from flask import Blueprint, current_app, render_template, request, jsonify, send_file
 from werkzeug.utils import secure_filename
+from functools import lru_cache
+import copy
+import hashlib
+import io
 import os
-from app.parsers.extractor import DataExtractor
+import uuid
+import orjson
 from app.config import Config
-import json
+from app.jobs import JOBS
+from app.result_cache import ResultCache
 
 main_bp = Blueprint('main', __name__)
 upload_bp = Blueprint('upload', __name__, url_prefix='/api')
 
-ALLOWED_EXTENSIONS = {'pdf', 'docx', 'xlsx'}
+# Supported upload extensions and the DataExtractor file type of each
+_EXT = {'pdf': 'pdf', 'docx': 'word', 'xlsx': 'excel'}
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# Query-string values accepted as true for boolean flags
+_TRUTHY = frozenset({'1', 'true', 'yes', 'on', 't', 'y'})
 
-def get_file_type(filename):
-    ext = filename.rsplit('.', 1)[1].lower()
-    if ext == 'pdf':
-        return 'pdf'
-    elif ext == 'docx':
-        return 'word'
-    elif ext == 'xlsx':
-        return 'excel'
-    return None
+# Extraction results of recent uploads, keyed by _result_key
+_results = ResultCache(Config.RESULT_CACHE_SIZE)
+
+@lru_cache(maxsize=2048)
+def _classify(filename):
+    """File type for a filename's extension, or None when it is not supported"""
+    i = filename.rfind('.')
+    return _EXT.get(filename[i + 1:].lower()) if i >= 0 else None
+
+def read_upload(file):
+    """Read an uploaded file once; returns its bytes and their content hash"""
+    data = file.read()
+    return data, hashlib.blake2b(data, digest_size=16).hexdigest()
+
+@lru_cache(maxsize=1)
+def get_extractor():
+    """DataExtractor, imported on first use so workers start without loading every parser"""
+    from app.parsers.extractor import DataExtractor
+    return DataExtractor
+
+def _bool_arg(name, default=None):
+    """Boolean query parameter, or default when it is absent"""
+    value = request.args.get(name)
+    return default if value is None else value.lower() in _TRUTHY
+
+def _result_key(content_hash, file_type, use_openai, include_raw):
+    """Cache key for an upload's result; None for use_openai means the configured default"""
+    if use_openai is None:
+        use_openai = Config.USE_OPENAI_EXTRACTION
+    return (content_hash, file_type, bool(use_openai), include_raw)
+
+def _cacheable(result):
+    """Regex fallbacks after an OpenAI failure are not cached, so the next upload retries OpenAI"""
+    return result['file_info']['extraction_method'] != 'regex_fallback'
+
+def _cache_headers(response):
+    """Let clients reuse a result; it only depends on the uploaded content and options"""
+    response.headers['Cache-Control'] = f'private, max-age={Config.RESULT_CACHE_MAX_AGE_SECONDS}'
+    return response
+
+def _extract_upload(data, content_hash, file_type, use_openai, include_raw, filename, filepath):
+    """Extract one upload's bytes, reusing the cached result of identical content"""
+    key = _result_key(content_hash, file_type, use_openai, include_raw)
+    result = _results.get(key)
+    if result is None:
+        extractor = get_extractor().from_bytes(data, file_type, use_openai=use_openai, include_raw=include_raw)
+        result = extractor.extract_all()
+        if _cacheable(result):
+            _results.set(key, result)
+    result['file_info']['file_name'] = filename
+    result['file_info']['content_hash'] = content_hash
+    result['file_info']['file_path'] = filepath
+    return result
+
+def save_upload(data, filename):
+    """Write an upload's bytes to a new directory in the upload folder; returns the file's path"""
+    # One directory per upload, so files sharing a name never overwrite each other;
+    # create_app makes the upload folder itself once at start-up
+    directory = os.path.join(current_app.config['UPLOAD_FOLDER'], uuid.uuid4().hex)
+    os.mkdir(directory)
+    filepath = os.path.join(directory, filename)
+    with open(filepath, 'wb') as out:
+        out.write(data)
+    return filepath
 
 @main_bp.route('/')
 def index():
@@ -40,109 +102,132 @@ def get_config():
 @upload_bp.route('/upload', methods=['POST'])
 def upload_file():
     """Handle file upload and parsing"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename):
-            return jsonify({'error': 'File type not supported. Please upload PDF, Word, or Excel files.'}), 400
-        
-        # Check for use_openai parameter in request
-        use_openai = request.args.get('use_openai', None)
-        if use_openai is not None:
-            use_openai = use_openai.lower() == 'true'
-        
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        upload_folder = 'uploads'
-        os.makedirs(upload_folder, exist_ok=True)
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
-        
-        # Parse the file with specified extraction method
-        file_type = get_file_type(filename)
-        extractor = DataExtractor(filepath, file_type, use_openai=use_openai)
-        result = extractor.extract_all()
-        
-        return jsonify(result), 200
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file provided'}), 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    file_type = _classify(file.filename)
+    if file_type is None:
+        return jsonify({'error': 'File type not supported. Please upload PDF, Word, or Excel files.'}), 400
+    
+    # Absent means the configured default
+    use_openai = _bool_arg('use_openai')
     
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    # Raw parser output is only returned when explicitly requested
+    include_raw = _bool_arg('include_raw', False)
+    
+    # Uploads are parsed in memory; they are only written to disk when asked to keep them
+    keep_upload = _bool_arg('keep_upload', False)
+    
+    # The body is read once; the parser works from these bytes even when a copy is kept
+    filename = secure_filename(file.filename)
+    data, content_hash = read_upload(file)
+    filepath = save_upload(data, filename) if keep_upload else None
+    
+    if _bool_arg('async', False):
+        # Extract in the background; the client polls /api/jobs/<job_id> for the result
+        job_id = JOBS.submit(_extract_upload, data, content_hash, file_type, use_openai, include_raw, filename, filepath)
+        return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+    
+    result = _extract_upload(data, content_hash, file_type, use_openai, include_raw, filename, filepath)
+    return _cache_headers(jsonify(result)), 200
+
+@upload_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a background extraction, with its result once finished"""
+    job = JOBS.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job), 200
 
 @upload_bp.route('/batch-upload', methods=['POST'])
 def batch_upload():
     """Handle multiple file uploads"""
-    try:
-        if 'files' not in request.files:
-            return jsonify({'error': 'No files provided'}), 400
-        
-        files = request.files.getlist('files')
-        results = []
-        errors = []
-        
-        # Check for use_openai parameter in request
-        use_openai = request.args.get('use_openai', None)
-        if use_openai is not None:
-            use_openai = use_openai.lower() == 'true'
-        
-        for file in files:
-            try:
-                if file.filename == '':
-                    continue
-                
-                if not allowed_file(file.filename):
-                    errors.append({'file': file.filename, 'error': 'File type not supported'})
-                    continue
-                
-                filename = secure_filename(file.filename)
-                upload_folder = 'uploads'
-                os.makedirs(upload_folder, exist_ok=True)
-                filepath = os.path.join(upload_folder, filename)
-                file.save(filepath)
-                
-                file_type = get_file_type(filename)
-                extractor = DataExtractor(filepath, file_type, use_openai=use_openai)
-                result = extractor.extract_all()
-                result['filename'] = filename
-                results.append(result)
+    if 'files' not in request.files:
+        return jsonify({'error': 'No files provided'}), 400
+    
+    files = request.files.getlist('files')
+    results = []
+    errors = []
+    
+    # Absent means the configured default
+    use_openai = _bool_arg('use_openai')
+    
+    # Raw parser output is only returned when explicitly requested
+    include_raw = _bool_arg('include_raw', False)
+    
+    # Uploads are parsed in memory; they are only written to disk when asked to keep them
+    keep_upload = _bool_arg('keep_upload', False)
+    
+    uploads = []
+    sources = []
+    # Identical files in one batch are extracted once
+    pending = {}
+    for file in files:
+        try:
+            if file.filename == '':
+                continue
             
-            except Exception as e:
-                errors.append({'file': file.filename, 'error': str(e)})
+            file_type = _classify(file.filename)
+            if file_type is None:
+                errors.append({'file': file.filename, 'error': 'File type not supported'})
+                continue
+            
+            filename = secure_filename(file.filename)
+            data, content_hash = read_upload(file)
+            filepath = save_upload(data, filename) if keep_upload else None
+            key = _result_key(content_hash, file_type, use_openai, include_raw)
+            cached = _results.get(key)
+            if cached is None and key not in pending:
+                pending[key] = len(sources)
+                sources.append((data, file_type))
+            uploads.append((file.filename, filename, content_hash, filepath, key, cached))
         
-        return jsonify({'results': results, 'errors': errors}), 200
+        except Exception as e:
+            errors.append({'file': file.filename, 'error': str(e)})
+    
+    # Files are independent, so they are extracted concurrently
+    batch = get_extractor().extract_batch(sources, use_openai=use_openai, include_raw=include_raw)
+    for key, index in pending.items():
+        if 'error' not in batch[index] and _cacheable(batch[index]):
+            _results.set(key, batch[index])
     
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    used = set()
+    for original_name, filename, content_hash, filepath, key, result in uploads:
+        if result is None:
+            index = pending[key]
+            # Duplicates get their own copy, since filename and file_info differ per upload
+            result = copy.deepcopy(batch[index]) if index in used else batch[index]
+            used.add(index)
+        if 'error' in result:
+            errors.append({'file': original_name, 'error': result['error']})
+        else:
+            result['filename'] = filename
+            result['file_info']['file_name'] = filename
+            result['file_info']['content_hash'] = content_hash
+            result['file_info']['file_path'] = filepath
+            results.append(result)
+    
+    return _cache_headers(jsonify({'results': results, 'errors': errors})), 200
 
 @upload_bp.route('/update', methods=['POST'])
 def update_data():
     """Update extracted data"""
-    try:
-        data = request.get_json()
-        # Here you could save to database or return the updated data
-        # For now, we'll just return the updated data back
-        return jsonify(data), 200
-    
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    data = request.get_json()
+    # Here you could save to database or return the updated data
+    # For now, we'll just return the updated data back
+    return jsonify(data), 200
 
 @upload_bp.route('/export', methods=['POST'])
 def export_results():
     """Export extracted data as JSON"""
-    try:
-        data = request.get_json()
-        
-        # Create JSON file
-        output_file = 'extracted_data.json'
-        with open(output_file, 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        return send_file(output_file, as_attachment=True, download_name='extracted_data.json')
+    data = request.get_json()
     
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    # Serialize straight into the response; no file is written, so concurrent exports can't collide
+    payload = io.BytesIO(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    return send_file(payload, mimetype='application/json', as_attachment=True,
+                     download_name='extracted_data.json')
 
@@ -1,5 +1,24 @@
 # JSON Schemas for CRE Data Extraction with Citations
 
+from types import MappingProxyType
+
+# Shared leaf: a cited value with its unit and the document text it came from.
+# Fields reference one object per value type instead of repeating the block.
+def _cited(value_type: str) -> dict:
+    """Schema of a cited field whose value has the given JSON type"""
+    return {
+        "type": "object",
+        "properties": {
+            "value": {"type": [value_type, "null"]},
+            "unit": {"type": ["string", "null"]},
+            "source_text": {"type": ["string", "null"]}
+        }
+    }
+
+_CITED_STRING = _cited("string")
+_CITED_NUMBER = _cited("number")
+_CITED_INTEGER = _cited("integer")
+
 CRE_EXTRACTION_SCHEMA = {
     "name": "CRE_Commercial_Real_Estate_Extraction",
     "description": "Structured extraction of Commercial Real Estate underwriting data with source citations",
@@ -19,78 +38,15 @@ CRE_EXTRACTION_SCHEMA = {
                             "source_text": {"type": ["string", "null"], "description": "Exact text snippet from document"}
                         }
                     },
-                    "property_type": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["string", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "square_footage": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "acres": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "land_square_feet": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "gross_building_area": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "net_rentable_area": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "year_built": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["integer", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "units": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["integer", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "occupancy_rate": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    }
+                    "property_type": _CITED_STRING,
+                    "square_footage": _CITED_NUMBER,
+                    "acres": _CITED_NUMBER,
+                    "land_square_feet": _CITED_NUMBER,
+                    "gross_building_area": _CITED_NUMBER,
+                    "net_rentable_area": _CITED_NUMBER,
+                    "year_built": _CITED_INTEGER,
+                    "units": _CITED_INTEGER,
+                    "occupancy_rate": _CITED_NUMBER
                 },
                 "required": ["property_address", "property_type", "square_footage", "acres", "land_square_feet", "gross_building_area", "net_rentable_area", "year_built", "units", "occupancy_rate"],
                 "additionalProperties": False
@@ -99,102 +55,18 @@ CRE_EXTRACTION_SCHEMA = {
                 "type": "object",
                 "description": "Key financial metrics with citations",
                 "properties": {
-                    "noi_annual": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "stabilized_noi": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "cap_rate": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "purchase_price": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "appraised_value": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "annual_gross_income": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "operating_expenses": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "debt_service": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "dscr": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "irr": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "project_cost": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "expected_exit_valuation": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
+                    "noi_annual": _CITED_NUMBER,
+                    "stabilized_noi": _CITED_NUMBER,
+                    "cap_rate": _CITED_NUMBER,
+                    "purchase_price": _CITED_NUMBER,
+                    "appraised_value": _CITED_NUMBER,
+                    "annual_gross_income": _CITED_NUMBER,
+                    "operating_expenses": _CITED_NUMBER,
+                    "debt_service": _CITED_NUMBER,
+                    "dscr": _CITED_NUMBER,
+                    "irr": _CITED_NUMBER,
+                    "project_cost": _CITED_NUMBER,
+                    "expected_exit_valuation": _CITED_NUMBER,
                     "expected_rents": {
                         "type": "array",
                         "description": "Expected rent figures with citations",
@@ -219,62 +91,13 @@ CRE_EXTRACTION_SCHEMA = {
                 "type": "object",
                 "description": "Financing information with citations",
                 "properties": {
-                    "loan_amount": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "interest_rate": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "loan_term_years": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["integer", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "loan_type": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["string", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "lender": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["string", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "maturity_date": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["string", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "ltv": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["number", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    }
+                    "loan_amount": _CITED_NUMBER,
+                    "interest_rate": _CITED_NUMBER,
+                    "loan_term_years": _CITED_INTEGER,
+                    "loan_type": _CITED_STRING,
+                    "lender": _CITED_STRING,
+                    "maturity_date": _CITED_STRING,
+                    "ltv": _CITED_NUMBER
                 },
                 "required": ["loan_amount", "interest_rate", "loan_term_years", "loan_type", 
                             "lender", "maturity_date", "ltv"],
@@ -296,22 +119,8 @@ CRE_EXTRACTION_SCHEMA = {
                         },
                         "maxItems": 5
                     },
-                    "lease_terms": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["string", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "tenant_quality": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["string", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    }
+                    "lease_terms": _CITED_STRING,
+                    "tenant_quality": _CITED_STRING
                 },
                 "required": ["major_tenants", "lease_terms", "tenant_quality"],
                 "additionalProperties": False
@@ -320,22 +129,8 @@ CRE_EXTRACTION_SCHEMA = {
                 "type": "object",
                 "description": "Market-related information with citations",
                 "properties": {
-                    "market": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["string", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
-                    "submarket": {
-                        "type": "object",
-                        "properties": {
-                            "value": {"type": ["string", "null"]},
-                            "unit": {"type": ["string", "null"]},
-                            "source_text": {"type": ["string", "null"]}
-                        }
-                    },
+                    "market": _CITED_STRING,
+                    "submarket": _CITED_STRING,
                     "comparable_properties": {
                         "type": "array",
                         "description": "List of comparable properties with citations",
@@ -435,6 +230,26 @@ CRE_EXTRACTION_SCHEMA = {
     }
 }
 
+# Several documents extracted in one request: one CRE_EXTRACTION_SCHEMA object per
+# document, in input order. Structured outputs need an object root, hence the wrapper.
+CRE_BATCH_EXTRACTION_SCHEMA = {
+    "name": "CRE_Commercial_Real_Estate_Batch_Extraction",
+    "description": "Structured extraction of several Commercial Real Estate documents with source citations",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "documents": {
+                "type": "array",
+                "description": "One extraction per input document, in the order the documents were given",
+                "items": CRE_EXTRACTION_SCHEMA["schema"]
+            }
+        },
+        "required": ["documents"],
+        "additionalProperties": False
+    }
+}
+
 # Backward compatible schema for regex-based extraction
 REGEX_EXTRACTION_SCHEMA = {
     "property_details": {},
@@ -444,3 +259,36 @@ REGEX_EXTRACTION_SCHEMA = {
     "market_analysis": {},
     "risk_factors": {}
 }
+
+
+def _freeze(node, memo=None):
+    """Read-only copy of a schema: dicts become mappingproxies, lists tuples"""
+    if memo is None:
+        memo = {}
+    if id(node) in memo:
+        # Shared sub-schemas (the _CITED_* leaves) stay shared once frozen
+        return memo[id(node)]
+    if isinstance(node, dict):
+        frozen = MappingProxyType({key: _freeze(value, memo) for key, value in node.items()})
+    elif isinstance(node, list):
+        frozen = tuple(_freeze(item, memo) for item in node)
+    else:
+        return node
+    memo[id(node)] = frozen
+    return frozen
+
+def _thaw(node):
+    """Plain, fully independent copy of a frozen schema: dicts and lists, nothing shared"""
+    if isinstance(node, MappingProxyType):
+        return {key: _thaw(value) for key, value in node.items()}
+    if isinstance(node, tuple):
+        return [_thaw(item) for item in node]
+    return node
+
+CRE_EXTRACTION_SCHEMA = _freeze(CRE_EXTRACTION_SCHEMA)
+CRE_BATCH_EXTRACTION_SCHEMA = _freeze(CRE_BATCH_EXTRACTION_SCHEMA)
+# The OpenAI SDK and json only serialize real dicts, so requests send plain copies
+# rebuilt from the frozen versions, which everything in-process reads; the two
+# cannot drift apart, and no leaf of the copies is shared between fields.
+CRE_EXTRACTION_SCHEMA_JSON = _thaw(CRE_EXTRACTION_SCHEMA)
+CRE_BATCH_EXTRACTION_SCHEMA_JSON = _thaw(CRE_BATCH_EXTRACTION_SCHEMA)
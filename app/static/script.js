@@ -114,7 +114,7 @@ function createFileCard(result, index) {
     const header = document.createElement('div');
     header.className = 'file-result-header';
     header.innerHTML = `
-        <h3>${file_info.file_path}</h3>
+        <h3>${file_info.file_name || file_info.file_path}</h3>
         <div class="file-info">
             <strong>Type:</strong> ${file_info.file_type} | 
             <strong>Pages/Sheets:</strong> ${file_info.pages}
@@ -0,0 +1,16 @@
+import tempfile
+from typing import IO, Optional
+from flask import Request
+
+# Uploaded files up to this size stay in memory while the form is parsed;
+# Werkzeug's default spills anything over 500 KB to a temporary file.
+UPLOAD_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+class UploadRequest(Request):
+    """Request class that keeps typical document uploads in memory"""
+    
+    def _get_file_stream(self, total_content_length: Optional[int], content_type: Optional[str],
+                         filename: Optional[str] = None, content_length: Optional[int] = None) -> IO[bytes]:
+        """Spool each uploaded file in memory up to UPLOAD_SPOOL_MAX_SIZE"""
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_SIZE, mode='rb+')
@@ -4,70 +4,63 @@ from openai import OpenAI
 import pandas as pd
 from markitdown import MarkItDown
 import io
-from pydantic import BaseModel, Field
-from typing import Optional, List, Literal
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from typing import List
+from cre_models import ValueWithSource, CREExtraction
 from dotenv import load_dotenv
 import os
 
+try:
+    import tiktoken
+except ImportError:
+    # Optional: without tiktoken, document sizes are estimated from character counts
+    tiktoken = None
+
 # Only process files and make API call if files are uploaded
 # Load environment variables from .env file
 load_dotenv()
 
-class ValueWithSource(BaseModel):
-    value: Optional[float] = Field(
-        None,
-        description="Numeric value extracted from the document. Null if missing."
-    )
-    unit: Optional[str] = Field(
-        None,
-        description="Unit associated with the value (e.g., USD, SF, acres)."
-    )
-    source_text: Optional[str] = Field(
-        None,
-        description="Exact text snippet from the PDF supporting this value."
-    )
-
-
-class RentEntry(BaseModel):
-    type: Optional[str] = Field(
-        None,
-        description="Type of rent (e.g., 'market', 'stabilized', 'pro forma')."
-    )
-    value: Optional[float] = Field(
-        None,
-        description="Rent value extracted from the document."
-    )
-    unit: Optional[str] = Field(
-        None,
-        description="Unit for rent (e.g., USD/SF/year, USD/month)."
-    )
-    source_text: Optional[str] = Field(
-        None,
-        description="Exact supporting text from the PDF."
-    )
+# Fixed instructions, sent first and byte-identical on every call so OpenAI's
+# automatic prompt caching can reuse the prefix; the fields themselves are
+# described by the CREExtraction schema
+SYSTEM_PROMPT = (
+    "Extract commercial real estate metrics from the document(s). For each value, give the number, "
+    "its unit, and the exact supporting text from the document as source_text (shown to users as a citation). "
+    "Use null for fields not mentioned."
+)
 
+# Documents shorter than this many characters go to the cheaper model when
+# auto-routing is on; longer ones use the selected model
+SMALL_DOCUMENT_MODEL = "gpt-4o-mini"
+SMALL_DOCUMENT_MAX_CHARS = 8000
+
+# Token budget of one document. Longer documents keep only the paragraphs that
+# mention CRE figures or terms, plus one paragraph either side for context
+MAX_DOCUMENT_TOKENS = 8000
+CHARS_PER_TOKEN = 4
+CRE_KEYWORDS = re.compile(
+    r"\$\s?[\d,]+|%|\bNOI\b|\bcap(?:italization)?\s*rate|\brent|\bacres?\b|square\s*f(?:ee|oo)t|\bsq\.?\s*ft\b"
+    r"|\bSF\b|\bGBA\b|\bNRA\b|\bexit\b|\bstabiliz|\boperating\s+expense|\bproject\s+cost|\bvaluation|\bunits?\b",
+    re.IGNORECASE
+)
 
-class CREExtraction(BaseModel):
-    total_project_cost: ValueWithSource
-    expected_exit_valuation: ValueWithSource
-    stabilized_noi: ValueWithSource
-    expected_rents: List[RentEntry]
-    operating_expenses: ValueWithSource
-    acres: ValueWithSource
-    land_square_feet: ValueWithSource
-    gross_building_area: ValueWithSource
-    net_rentable_area: ValueWithSource
+# Initialize and wrap OpenAI client once per server, so its connection pool
+# survives reruns; the shared client must not be mutated
+@st.cache_resource
+def get_client():
+    return instructor.from_openai(OpenAI(api_key=os.getenv('OPENAI_API_KEY', '')))
 
-# Initialize and wrap OpenAI client 
-raw_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY', ''))
-client = instructor.from_openai(raw_client)
+client = get_client()
 
-@st.cache_data(show_spinner="Fetching available models...")
+# The model list rarely changes, so one copy is shared by every session for six hours
+@st.cache_resource(ttl="6h", show_spinner="Fetching available models...")
 def get_available_chat_models():
     models = client.models.list()
-    chat_models = [m.id for m in models.data if m.id.startswith("gpt-")]
-    chat_models.sort(reverse=True)
-    return chat_models
+    # A tuple, since the shared value must not be mutated
+    return tuple(sorted((m.id for m in models.data if m.id.startswith("gpt-")), reverse=True))
 
 st.title("Commercial Real Estate Diagnostic Tool")
 
@@ -82,6 +75,8 @@ selected_model = st.selectbox(
 )
 st.session_state["openai_model"] = selected_model
 
+auto_route = st.sidebar.checkbox(f"Auto-route small documents to {SMALL_DOCUMENT_MODEL}", value=True)
+
 # Upload multiple files
 uploaded_files = st.file_uploader(
     "Upload files (CSV, TXT, PDF, Excel, Word)", 
@@ -94,44 +89,118 @@ if uploaded_files and len(uploaded_files) > max_files:
     st.warning(f"Please upload no more than {max_files} files.")
     uploaded_files = uploaded_files[:max_files]
 
-
-# Extract file contents
-file_contents = []
-converter = MarkItDown()
-for file in uploaded_files:
-    file_name = file.name
-    result = converter.convert_stream(stream=file, filename=file_name)
-    markdown_content = result.text_content
-    file_contents.append(f"### Document: {file_name}\n[source: {file_name}]\n{markdown_content}\n")
-
-# Create prompt with improved extraction guidance
-prompt = {
-    "role": "user",
-    "content": (
-        f"Extract detailed commercial real estate financial and operational metrics from the following document(s). "
-        f"For EACH extracted value, provide: the numeric value, its unit, and the EXACT text snippet from the document that supports it. "
-        f"If a field is not mentioned in the document, set value to null. "
-        f"\n\nKey fields to extract:\n"
-        f"- Total Project Cost: The total capital investment or development cost\n"
-        f"- Expected Exit Valuation: The projected sale price or property valuation at exit\n"
-        f"- Stabilized NOI: Net operating income when the property reaches stabilization\n"
-        f"- Expected Rents: All rent figures mentioned (market rent, stabilized rent, pro forma rent, etc.)\n"
-        f"- Operating Expenses: Annual or monthly operating costs\n"
-        f"- Acres: Total land acreage\n"
-        f"- Land Square Feet: Land area in square feet\n"
-        f"- Gross Building Area (GBA): Total building square footage\n"
-        f"- Net Rentable Area (NRA): Rentable square footage\n\n"
-        f"CRITICAL: For each value extracted, ALWAYS include the exact source text from the document. "
-        f"This text will be displayed to users as a citation.\n\n"
-        f"Documents:\n{file_contents}"
+# Nothing to convert or extract until a file is uploaded
+if not uploaded_files:
+    st.info("Upload a document to extract data.")
+    st.stop()
+
+
+# One converter for every rerun and session
+@st.cache_resource
+def get_converter():
+    return MarkItDown()
+
+# Markdown of an uploaded file, cut to the token budget, keyed on its name and
+# bytes so reruns skip both re-parsing and re-counting tokens
+@st.cache_data(show_spinner=False, max_entries=50, ttl="1h")
+def convert_file(file_name: str, data: bytes) -> str:
+    markdown_content = get_converter().convert_stream(stream=io.BytesIO(data), filename=file_name).text_content
+    return compress_document(markdown_content)
+
+@st.cache_resource
+def get_encoding():
+    return tiktoken.get_encoding("o200k_base") if tiktoken is not None else None
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+# Cut a long document down to its CRE paragraphs, then to the leading
+# MAX_DOCUMENT_TOKENS if that is still too long
+def compress_document(text: str) -> str:
+    if count_tokens(text) <= MAX_DOCUMENT_TOKENS:
+        return text
+    paragraphs = text.split("\n\n")
+    matches = [CRE_KEYWORDS.search(paragraph) is not None for paragraph in paragraphs]
+    text = "\n\n".join(
+        paragraph for index, paragraph in enumerate(paragraphs) if any(matches[max(0, index - 1):index + 2])
     )
-}
-
-response = client.chat.completions.create(
-    model=st.session_state["openai_model"], 
-    response_model=CREExtraction, 
-    messages=[prompt]
-)
+    if count_tokens(text) <= MAX_DOCUMENT_TOKENS:
+        return text
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:MAX_DOCUMENT_TOKENS * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:MAX_DOCUMENT_TOKENS])
+
+# A document as sent to the model. The bare markdown is dropped as soon as its
+# headed copy exists, so only one copy of each document's text stays in memory
+def load_document(file) -> str:
+    file_name = file.name
+    markdown_content = convert_file(file_name, file.getvalue())
+    return f"### Document: {file_name}\n[source: {file_name}]\n{markdown_content}\n"
+
+# Extract file contents, converting the files in parallel; map keeps upload order,
+# and each worker thread gets this script's context so it can use the cache
+with st.spinner("Converting..."), ThreadPoolExecutor(
+    max_workers=max(1, min(8, len(uploaded_files))),
+    initializer=add_script_run_ctx,
+    initargs=(None, get_script_run_ctx())
+) as executor:
+    file_contents = list(executor.map(load_document, uploaded_files))
+
+# Extraction of one document for a model, keyed on the document's hash so widget
+# reruns skip the API call; Streamlit leaves the underscore argument out of the
+# cache key. The result is cached as a dict and validated back into CREExtraction.
+# The user message carries only the document.
+@st.cache_data(ttl="1h", max_entries=32, show_spinner=False)
+def extract(model: str, document_hash: str, _document: str) -> dict:
+    return client.chat.completions.create(
+        model=model,
+        response_model=CREExtraction,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": _document}
+        ]
+    ).model_dump()
+
+def extract_document(document: str, model: str) -> CREExtraction:
+    document_hash = hashlib.sha1(document.encode()).hexdigest()
+    return CREExtraction.model_validate(extract(model, document_hash, document))
+
+# Short documents don't need the selected (often much pricier) model
+def route_model(document: str) -> str:
+    if auto_route and len(document) < SMALL_DOCUMENT_MAX_CHARS:
+        return SMALL_DOCUMENT_MODEL
+    return st.session_state["openai_model"]
+
+# Combine per-document extractions: each field takes the first document's non-null
+# value, and rent entries from every document are kept
+def merge_extractions(extractions: List[CREExtraction]) -> CREExtraction:
+    merged = {}
+    for name in CREExtraction.model_fields:
+        if name == "expected_rents":
+            merged[name] = [rent for extraction in extractions for rent in extraction.expected_rents]
+        else:
+            merged[name] = next(
+                (getattr(extraction, name) for extraction in extractions if getattr(extraction, name).value is not None),
+                ValueWithSource()
+            )
+    return CREExtraction(**merged)
+
+# One request per document, sent concurrently, so each request carries only its
+# own document and shares the cached instruction prefix with the others
+with st.spinner("Extracting..."), ThreadPoolExecutor(
+    max_workers=max(1, min(8, len(file_contents))),
+    initializer=add_script_run_ctx,
+    initargs=(None, get_script_run_ctx())
+) as executor:
+    models = [route_model(document) for document in file_contents]
+    extractions = list(executor.map(extract_document, file_contents, models))
+response = merge_extractions(extractions)
+if models:
+    st.caption(f"Model used: {', '.join(sorted(set(models)))}")
 
 # Display extracted data with citations
 st.subheader("Extracted Commercial Real Estate Data")
@@ -0,0 +1,56 @@
+"""Pydantic models of the CRE diagnostic extraction.
+
+Kept out of cre_diagnostic.py, which Streamlit re-executes on every rerun:
+imported once, the classes keep one identity, so pydantic's validators and
+instructor's schema for them are built once per process.
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+class ValueWithSource(BaseModel):
+    value: Optional[float] = Field(
+        None,
+        description="Numeric value extracted from the document. Null if missing."
+    )
+    unit: Optional[str] = Field(
+        None,
+        description="Unit associated with the value (e.g., USD, SF, acres)."
+    )
+    source_text: Optional[str] = Field(
+        None,
+        description="Exact text snippet from the PDF supporting this value."
+    )
+
+
+class RentEntry(BaseModel):
+    type: Optional[str] = Field(
+        None,
+        description="Type of rent (e.g., 'market', 'stabilized', 'pro forma')."
+    )
+    value: Optional[float] = Field(
+        None,
+        description="Rent value extracted from the document."
+    )
+    unit: Optional[str] = Field(
+        None,
+        description="Unit for rent (e.g., USD/SF/year, USD/month)."
+    )
+    source_text: Optional[str] = Field(
+        None,
+        description="Exact supporting text from the PDF."
+    )
+
+
+# Field guidance lives in the descriptions, which instructor sends as the JSON
+# schema, so the prompt does not repeat it
+class CREExtraction(BaseModel):
+    total_project_cost: ValueWithSource = Field(description="Total capital investment or development cost.")
+    expected_exit_valuation: ValueWithSource = Field(description="Projected sale price or valuation at exit.")
+    stabilized_noi: ValueWithSource = Field(description="Net operating income at stabilization.")
+    expected_rents: List[RentEntry] = Field(description="Every rent figure (market, stabilized, pro forma, etc.).")
+    operating_expenses: ValueWithSource = Field(description="Annual or monthly operating costs.")
+    acres: ValueWithSource = Field(description="Total land acreage.")
+    land_square_feet: ValueWithSource = Field(description="Land area in square feet.")
+    gross_building_area: ValueWithSource = Field(description="Gross building area (GBA) in square feet.")
+    net_rentable_area: ValueWithSource = Field(description="Net rentable area (NRA) in square feet.")
@@ -7,6 +7,7 @@ This script creates test Word and Excel files
 from docx import Document
 from docx.shared import Pt, RGBColor
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill
 import os
 
@@ -75,19 +76,30 @@ def create_sample_word_doc():
 
 def create_sample_excel_doc():
     """Create a sample CRE financial model in Excel"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Financial Summary"
+    # Write-only mode streams rows to the file instead of keeping every cell in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Financial Summary")
     
     # Headers
     header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
     header_font = Font(bold=True, color="FFFFFF")
     
-    headers = ["Metric", "Value", "Unit"]
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
+    def header_row(sheet, headers):
+        """Styled header cells; write-only cells are styled before they are appended"""
+        cells = []
+        for header in headers:
+            cell = WriteOnlyCell(sheet, value=header)
+            cell.fill = header_fill
+            cell.font = header_font
+            cells.append(cell)
+        return cells
+    
+    # Column widths must be set before any row is written
+    ws.column_dimensions['A'].width = 25
+    ws.column_dimensions['B'].width = 20
+    ws.column_dimensions['C'].width = 10
+    
+    ws.append(header_row(ws, ["Metric", "Value", "Unit"]))
     
     # Data
     data = [
@@ -105,22 +117,15 @@ def create_sample_excel_doc():
         ["Expected IRR", "12.5", "%"],
     ]
     
-    for row_idx, row_data in enumerate(data, 2):
-        for col_idx, value in enumerate(row_data, 1):
-            ws.cell(row=row_idx, column=col_idx, value=value)
-    
-    # Adjust column widths
-    ws.column_dimensions['A'].width = 25
-    ws.column_dimensions['B'].width = 20
-    ws.column_dimensions['C'].width = 10
+    for row_data in data:
+        ws.append(row_data)
     
     # Add Tenant Sheet
     tenant_ws = wb.create_sheet("Tenants")
-    tenant_headers = ["Tenant Name", "Square Feet", "Annual Rent", "Lease Expiration", "Credit Rating"]
-    for col, header in enumerate(tenant_headers, 1):
-        cell = tenant_ws.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
+    for col in range(1, 6):
+        tenant_ws.column_dimensions[chr(64 + col)].width = 20
+    
+    tenant_ws.append(header_row(tenant_ws, ["Tenant Name", "Square Feet", "Annual Rent", "Lease Expiration", "Credit Rating"]))
     
     tenant_data = [
         ["Tech Startup Inc.", "20000", "800000", "2029", "A+"],
@@ -129,12 +134,8 @@ def create_sample_excel_doc():
         ["Retail Space", "10000", "250000", "2026", "BBB"],
     ]
     
-    for row_idx, row_data in enumerate(tenant_data, 2):
-        for col_idx, value in enumerate(row_data, 1):
-            tenant_ws.cell(row=row_idx, column=col_idx, value=value)
-    
-    for col in range(1, 6):
-        tenant_ws.column_dimensions[chr(64 + col)].width = 20
+    for row_data in tenant_data:
+        tenant_ws.append(row_data)
     
     # Save
     filepath = 'samples/Sample_Financial_Model.xlsx'
@@ -1,13 +1,32 @@
+import asyncio
+import hashlib
 import json
 import os
+import sys
+from functools import lru_cache
 from pathlib import Path
-from openai import OpenAI
+from openai import AsyncOpenAI
 
-client = OpenAI()
+client = AsyncOpenAI()
+
+MODEL = "gpt-4.1"
+# JSON mode: every agent prompt asks for JSON, and this guarantees it parses
+RESPONSE_FORMAT = {"type": "json_object"}
+# Output-token caps per agent; the synthesis memo is the longest output of a run
+MAX_TOKENS = {"SynthesisAgent": 1500}
+
+# How often a submitted Batch API job is checked for completion
+BATCH_POLL_SECONDS = 30
+
+# Agent outputs are stored by a hash of model, prompt, input and context, so
+# re-running the same scenario (temperature 0) doesn't call the API again
+AGENT_CACHE_ENABLED = os.getenv("AGENT_CACHE_ENABLED", "true").lower() == "true"
+AGENT_CACHE_DIR = Path(__file__).parent / ".agent_cache"
 
 # -------------------------
 # Load prompts from markdown files
 # -------------------------
+@lru_cache(maxsize=None)
 def load_prompt(agent_name):
     """Load agent prompt from markdown file in prompts directory."""
     prompt_dir = Path(__file__).parent / "prompts"
@@ -35,7 +54,7 @@ AGENT_NAMES = [
 # Load all agent prompts at startup
 AGENTS = {name: load_prompt(name) for name in AGENT_NAMES}
 
-def run_agent(agent_name, user_input, context=None):
+def build_messages(agent_name, user_input, context=None):
     system_prompt = AGENTS[agent_name]
 
     messages = [
@@ -46,33 +65,185 @@ def run_agent(agent_name, user_input, context=None):
     if context:
         messages.append({"role": "assistant", "content": json.dumps(context)})
 
-    response = client.chat.completions.create(
-        model="gpt-4.1",
-        messages=messages,
-        temperature=0
+    return messages
+
+def completion_params(agent_name, user_input, context=None):
+    """Chat completion arguments for one agent call."""
+    params = {
+        "model": MODEL,
+        "messages": build_messages(agent_name, user_input, context),
+        "temperature": 0,
+        "response_format": RESPONSE_FORMAT
+    }
+    if agent_name in MAX_TOKENS:
+        params["max_tokens"] = MAX_TOKENS[agent_name]
+    return params
+
+# -------------------------
+# Response cache
+# -------------------------
+def cache_key(agent_name, user_input, context=None):
+    """Content address of one agent call: everything the request sends."""
+    # Hashing the full request means any change to how agents are called
+    # (model, messages, response format, token caps) starts a fresh entry
+    params = completion_params(agent_name, user_input, context)
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+def cache_get(key):
+    """Cached agent output for key, or None."""
+    if not AGENT_CACHE_ENABLED:
+        return None
+    try:
+        return json.loads((AGENT_CACHE_DIR / f"{key}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def cache_set(key, output):
+    """Store an agent output under key (best effort)."""
+    if not AGENT_CACHE_ENABLED:
+        return
+    try:
+        AGENT_CACHE_DIR.mkdir(exist_ok=True)
+        # Write then rename, so concurrent agents never read a half-written entry
+        tmp_path = AGENT_CACHE_DIR / f"{key}.{os.getpid()}.tmp"
+        tmp_path.write_text(json.dumps(output), encoding="utf-8")
+        tmp_path.replace(AGENT_CACHE_DIR / f"{key}.json")
+    except OSError:
+        pass
+
+# -------------------------
+# Agent calls
+# -------------------------
+def parse_output(agent_name, content, finish_reason):
+    """Decode an agent's JSON reply, refusing one cut off by its token cap."""
+    if finish_reason == "length":
+        # JSON mode output stops mid-object at the cap; it can't be parsed
+        raise RuntimeError(
+            f"{agent_name} output hit its max_tokens cap of {MAX_TOKENS.get(agent_name)} and was cut off; "
+            f"raise MAX_TOKENS[{agent_name!r}]"
+        )
+    return json.loads(content)
+
+async def run_agent(agent_name, user_input, context=None):
+    key = cache_key(agent_name, user_input, context)
+    output = cache_get(key)
+    if output is not None:
+        return output
+
+    response = await client.chat.completions.create(**completion_params(agent_name, user_input, context))
+
+    choice = response.choices[0]
+    output = parse_output(agent_name, choice.message.content, choice.finish_reason)
+    cache_set(key, output)
+    return output
+
+async def run_agents_batch(agent_contexts, user_input):
+    """Run several (agent, context) pairs, sending the uncached ones as one Batch API job."""
+    keys = [cache_key(agent_name, user_input, context) for agent_name, context in agent_contexts]
+    outputs = [cache_get(key) for key in keys]
+    misses = [index for index, output in enumerate(outputs) if output is None]
+    if misses:
+        submitted = await submit_agents_batch([agent_contexts[index] for index in misses], user_input)
+        for index, output in zip(misses, submitted):
+            cache_set(keys[index], output)
+            outputs[index] = output
+    return outputs
+
+async def submit_agents_batch(agent_contexts, user_input):
+    """Run several (agent, context) pairs as one Batch API job (half price, finishes within 24h)."""
+    agent_names = [agent_name for agent_name, _ in agent_contexts]
+    lines = [
+        json.dumps({
+            "custom_id": f"{index}-{agent_name}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": completion_params(agent_name, user_input, context)
+        })
+        for index, (agent_name, context) in enumerate(agent_contexts)
+    ]
+    batch_file = await client.files.create(file=("agents.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
     )
 
-    return json.loads(response.choices[0].message.content)
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        await asyncio.sleep(BATCH_POLL_SECONDS)
+        batch = await client.batches.retrieve(batch.id)
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+
+    # Output lines come back in any order; custom_id carries the input position
+    outputs = {}
+    output_file = await client.files.content(batch.output_file_id)
+    for line in output_file.text.splitlines():
+        record = json.loads(line)
+        index = int(record["custom_id"].split("-", 1)[0])
+        choice = record["response"]["body"]["choices"][0]
+        outputs[index] = parse_output(agent_names[index], choice["message"]["content"], choice.get("finish_reason"))
+    missing = [agent_names[index] for index in range(len(agent_names)) if index not in outputs]
+    if missing:
+        raise RuntimeError(f"Batch {batch.id} returned no output for: {', '.join(missing)}")
+    return [outputs[index] for index in range(len(agent_names))]
 
 # -------------------------
 # Orchestration
 # -------------------------
-def run_pipeline(user_request):
-    # Step 1: Router
-    plan = run_agent("RouterAgent", user_request)
+def plan_waves(tasks):
+    """Group planned agents into waves that only depend on agents in earlier waves."""
+    agents = list(dict.fromkeys(step["agent"] for step in tasks))
+    dependencies = {}
+    for step in tasks:
+        agent = step["agent"]
+        if agent in dependencies:
+            continue
+        depends_on = step.get("depends_on")
+        if depends_on is None:
+            # No dependency list: wait for every agent planned before it, as a sequential run would
+            depends_on = agents[:agents.index(agent)]
+        dependencies[agent] = [name for name in depends_on if name in agents and name != agent]
 
-    context = {}
+    waves = []
+    done = set()
+    remaining = agents
+    while remaining:
+        ready = [agent for agent in remaining if all(name in done for name in dependencies[agent])]
+        if not ready:
+            # Circular dependencies: run the earliest remaining agent with what is available
+            ready = remaining[:1]
+        waves.append(ready)
+        done.update(ready)
+        remaining = [agent for agent in remaining if agent not in done]
+    return waves, dependencies
 
-    # Step 2: Execute agents in order
-    for step in plan["tasks"]:
-        agent = step["agent"]
-        print(f"Running {agent}...")
+async def run_pipeline(user_request, async_mode=False):
+    # Step 1: Router (always run directly; the rest of the run depends on its plan)
+    plan = await run_agent("RouterAgent", user_request)
+
+    context = {}
 
-        output = run_agent(agent, user_request, context)
-        context[agent] = output
+    # Step 2: Execute agents wave by wave; agents in a wave don't depend on each
+    # other, so they run concurrently, each seeing its dependencies' outputs
+    waves, dependencies = plan_waves(plan["tasks"])
+    for wave in waves:
+        agent_contexts = [
+            (agent, {name: context[name] for name in dependencies[agent] if name in context})
+            for agent in wave
+        ]
+        if async_mode:
+            # Offline runs: the wave goes into one Batch API job at half the price
+            print(f"Submitting {', '.join(wave)} as a batch...")
+            outputs = await run_agents_batch(agent_contexts, user_request)
+        else:
+            print(f"Running {', '.join(wave)}...")
+            outputs = await asyncio.gather(*(
+                run_agent(agent, user_request, agent_context) for agent, agent_context in agent_contexts
+            ))
+        context.update(zip(wave, outputs))
 
     # Step 3: Synthesis
-    final_output = run_agent("SynthesisAgent", user_request, context)
+    final_output = await run_agent("SynthesisAgent", user_request, context)
 
     return final_output
 
@@ -81,5 +252,6 @@ def run_pipeline(user_request):
 # -------------------------
 if __name__ == "__main__":
     user_request = "Underwrite a 180-unit multifamily development in Helotes."
-    result = run_pipeline(user_request)
+    # --batch runs the agents through the Batch API (cheaper, but may take hours)
+    result = asyncio.run(run_pipeline(user_request, async_mode="--batch" in sys.argv[1:]))
     print(json.dumps(result, indent=2))
\ No newline at end of file
@@ -1,8 +1,15 @@
 import requests
+from requests.adapters import HTTPAdapter
+
+# One session for every probe, so repeat requests reuse the open connection
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
 
 try:
-    response = requests.get('http://127.0.0.1:5000/')
+    response = session.get('http://127.0.0.1:5000/')
     print(f'Status: {response.status_code}')
     print(f'Content (first 300 chars): {response.text[:300]}')
 except Exception as e:
     print(f'Error: {e}')
+finally:
+    session.close()
@@ -1,8 +1,10 @@
 """Test script to verify agent prompts load correctly from markdown files."""
 
 import json
+from functools import lru_cache
 from pathlib import Path
 
+@lru_cache(maxsize=None)
 def load_prompt(agent_name):
     """Load agent prompt from markdown file in prompts directory."""
     prompt_dir = Path(__file__).parent / "prompts"
@@ -130,6 +130,32 @@ def check_parsers():
         print(f"✗ Parser import failed: {str(e)}")
         return False
 
+def check_text_trimming():
+    """Check that long Word-style text keeps its CRE figures when trimmed for OpenAI"""
+    try:
+        from app.parsers.openai_extractor import OpenAIExtractor, TRUNCATION_MARKER
+        from app.config import Config
+        # Only the text preparation runs, so build the extractor without an API client
+        extractor = OpenAIExtractor.__new__(OpenAIExtractor)
+        extractor.model = Config.OPENAI_MODEL
+        extractor.max_tokens = Config.OPENAI_MAX_TOKENS
+        # One paragraph per line and no blank lines, as WordParser emits them
+        lines = [f"Paragraph {i} describes the neighborhood and general market conditions in some detail."
+                 for i in range(500)]
+        text = "\n".join(lines + ["Stabilized NOI: $1,250,000"])
+        prepared = extractor._prepare_text(text)
+        if len(prepared) >= len(text):
+            print("✗ Long text was not trimmed")
+            return False
+        if "Stabilized NOI: $1,250,000" not in prepared or TRUNCATION_MARKER not in prepared:
+            print("✗ Trimmed text lost its CRE figures or truncation marker")
+            return False
+        print(f"✓ Word-style text trimmed from {len(text):,} to {len(prepared):,} characters, NOI kept")
+        return True
+    except Exception as e:
+        print(f"✗ Text trimming check failed: {str(e)}")
+        return False
+
 def main():
     print("\n" + "="*50)
     print("CRE PARSER - VERIFICATION SCRIPT")
@@ -142,6 +168,7 @@ def main():
         ("Required Directories", check_directories),
         ("Sample Files", check_sample_files),
         ("Parser Modules", check_parsers),
+        ("OpenAI Text Trimming", check_text_trimming),
         ("Flask Application", check_app_initialization),
     ]
     